@@ -1,20 +1,14 @@
-import os
-import sys
-import time
+import argparse
 import random
+from functools import partial
 
-def get_terminal_size():
-    size = os.get_terminal_size()
-    width = size.columns
-    height = size.lines
-    print(width)
-    print(height)
-    return width, height
+import numpy as np
 
-def clear_screen():
-    sys.stdout.write('\033[2J')
-    sys.stdout.write('\033[H')
-    sys.stdout.flush()
+from ball_swarm import BallSwarm, density_rows, grid_cells
+from collisions import collide_balls
+from framebuffer import FrameBuffer, TerminalSize
+from scheduler import FrameScheduler
+from screen import FrameDiffWriter
 
 class Ball:
     def __init__(self, x, y, vx, vy):
@@ -23,68 +17,121 @@ class Ball:
         self.vx = vx  # x velocity
         self.vy = vy  # y velocity
 
-def main():
-    width, height = get_terminal_size()
-    # Ensure minimum size for proper animation
-    width = max(20, width)
-    height = max(10, height)
-    max_balls = 100  # Limit to prevent too many balls
-    balls = []
-    # Initialize one ball at a random position
-    initial_x = random.uniform(1, width - 2)
-    initial_y = random.uniform(1, height - 2)
-    initial_vx = random.choice([-1, 1]) * random.uniform(0.5, 1.5)
-    initial_vy = random.choice([-1, 1]) * random.uniform(0.5, 1.5)
-    balls.append(Ball(initial_x, initial_y, initial_vx, initial_vy))
+def update_balls(balls, width, height, max_balls, collide=False):
+    """Advance every ball by one fixed simulation step"""
+    if collide:
+        # Bounce balls off each other before they move
+        collide_balls(balls, width, height)
+    # Update the positions and velocities
+    new_balls = []
+    for ball in balls:
+        ball.x += ball.vx
+        ball.y += ball.vy
+        split = False
+        # Check for collision with walls
+        if ball.x <= 0:
+            split = True
+            ball.x = 0
+            ball.vx = abs(ball.vx)
+        elif ball.x >= width - 1:
+            split = True
+            ball.x = width - 1
+            ball.vx = -abs(ball.vx)
+        if ball.y <= 0:
+            split = True
+            ball.y = 0
+            ball.vy = abs(ball.vy)
+        elif ball.y >= height - 1:
+            split = True
+            ball.y = height - 1
+            ball.vy = -abs(ball.vy)
+        if split and len(balls) + len(new_balls) < max_balls:
+            # Split the ball into two
+            new_vx = random.choice([-1, 1]) * random.uniform(0.5, 1.5)
+            new_vy = random.choice([-1, 1]) * random.uniform(0.5, 1.5)
+            new_ball = Ball(ball.x, ball.y, new_vx, new_vy)
+            new_balls.append(new_ball)
+    balls.extend(new_balls)
+
+def draw_balls(balls, width, height, alpha=0.0, buffer=None):
+    """Draw the balls into a grid, interpolated alpha steps ahead"""
+    # Blank the grid, reusing the caller's buffer from frame to frame
+    if buffer is None:
+        buffer = FrameBuffer(width, height)
+    buffer.resize(width, height)
+    buffer.reset()
+    # Draw the balls, rounding to the nearest cell like round() does
+    x = np.rint(np.fromiter((ball.x + ball.vx * alpha for ball in balls), float, len(balls)))
+    y = np.rint(np.fromiter((ball.y + ball.vy * alpha for ball in balls), float, len(balls)))
+    inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+    buffer.glyphs[(y[inside] * width + x[inside]).astype(np.intp)] = buffer.table.glyph('O')
+    return buffer.rows()
+
+def draw_density(balls, width, height, alpha=0.0):
+    """Draw the balls shaded by how many share each cell"""
+    x = np.fromiter((ball.x + ball.vx * alpha for ball in balls), float, len(balls))
+    y = np.fromiter((ball.y + ball.vy * alpha for ball in balls), float, len(balls))
+    return density_rows(grid_cells(x, y, width, height), width, height)
+
+def main(swarm=False, max_balls=None, collide=False, density=False):
+    # The terminal size is only read again after a SIGWINCH, with a
+    # minimum size for proper animation
+    terminal = TerminalSize(minimum=(20, 10))
+    terminal.install_signal()
+    (width, height), _ = terminal.poll()
+    if swarm:
+        # Vectorized simulation that can grow to millions of balls
+        balls = BallSwarm(width, height, max_balls or 1000000, speed=(0.5, 1.5),
+                          collide=collide)
+        balls.spawn_random(1)
+
+        def bind(width, height):
+            balls.resize(width, height)
+            return balls.step, balls.draw_density if density else balls.draw
+    else:
+        max_balls = max_balls or 100  # Limit to prevent too many balls
+        balls = []
+        # Initialize one ball at a random position
+        initial_x = random.uniform(1, width - 2)
+        initial_y = random.uniform(1, height - 2)
+        initial_vx = random.choice([-1, 1]) * random.uniform(0.5, 1.5)
+        initial_vy = random.choice([-1, 1]) * random.uniform(0.5, 1.5)
+        balls.append(Ball(initial_x, initial_y, initial_vx, initial_vy))
+        # Every frame is drawn into the same grid
+        buffer = FrameBuffer(width, height)
+
+        def bind(width, height):
+            update = partial(update_balls, balls, width, height, max_balls, collide)
+            if density:
+                return update, partial(draw_density, balls, width, height)
+            return update, partial(draw_balls, balls, width, height, buffer=buffer)
+    update, draw = bind(width, height)
+    # Only the cells that change between frames are written
+    screen = FrameDiffWriter()
+    # Physics runs at a fixed rate, drawing at whatever rate we can keep up
+    scheduler = FrameScheduler(fps=30, sim_rate=20)
     
     try:
         while True:
-            clear_screen()
-            # Create an empty grid
-            grid = [[' ' for _ in range(width)] for _ in range(height)]
-            # Draw the balls
-            for ball in balls:
-                x_int = int(round(ball.x))
-                y_int = int(round(ball.y))
-                if 0 <= x_int < width and 0 <= y_int < height:
-                    grid[y_int][x_int] = 'O'
+            # Follow the terminal when it is resized
+            (width, height), resized = terminal.poll()
+            if resized:
+                update, draw = bind(width, height)
+            for _ in range(scheduler.sim_steps()):
+                update()
             # Print the grid
-            for row in grid:
-                print(''.join(row))
-            # Update the positions and velocities
-            new_balls = []
-            for ball in balls:
-                ball.x += ball.vx
-                ball.y += ball.vy
-                split = False
-                # Check for collision with walls
-                if ball.x <= 0:
-                    split = True
-                    ball.x = 0
-                    ball.vx = abs(ball.vx)
-                elif ball.x >= width - 1:
-                    split = True
-                    ball.x = width - 1
-                    ball.vx = -abs(ball.vx)
-                if ball.y <= 0:
-                    split = True
-                    ball.y = 0
-                    ball.vy = abs(ball.vy)
-                elif ball.y >= height - 1:
-                    split = True
-                    ball.y = height - 1
-                    ball.vy = -abs(ball.vy)
-                if split and len(balls) + len(new_balls) < max_balls:
-                    # Split the ball into two
-                    new_vx = random.choice([-1, 1]) * random.uniform(0.5, 1.5)
-                    new_vy = random.choice([-1, 1]) * random.uniform(0.5, 1.5)
-                    new_ball = Ball(ball.x, ball.y, new_vx, new_vy)
-                    new_balls.append(new_ball)
-            balls.extend(new_balls)
-            # Control the animation speed
-            time.sleep(0.05)
+            screen.write_frame(draw(scheduler.alpha))
+            scheduler.wait()
     except KeyboardInterrupt:
         pass  # Allow the user to exit with Ctrl+C
+    finally:
+        screen.close()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Bouncing balls that split when they hit a wall")
+    parser.add_argument('--swarm', action='store_true', help="use the vectorized NumPy simulation")
+    parser.add_argument('--max-balls', type=int, help="limit on the number of balls")
+    parser.add_argument('--collide', action='store_true', help="let balls bounce off each other")
+    parser.add_argument('--density', action='store_true', help="shade cells by how many balls they hold")
+    args = parser.parse_args()
+    main(args.swarm, args.max_balls, args.collide, args.density)
@@ -0,0 +1,142 @@
+import numpy as np
+
+from collisions import resolve_collisions
+from framebuffer import FrameBuffer
+
+# Glyphs for increasingly crowded cells, and the ball count where each
+# glyph after the blank one starts
+DENSITY_RAMP = np.array(list(' .:oO0@#'))
+DENSITY_STEPS = np.array([1, 2, 3, 5, 9, 17, 33])
+
+
+def grid_cells(x, y, width, height):
+    """Flat grid index of every position that lands on screen"""
+    # Round to the nearest cell; negative cells wrap around to huge
+    # unsigned values, so one comparison per axis does the bounds check
+    col = np.floor(x + 0.5).astype(np.int32).view(np.uint32)
+    row = np.floor(y + 0.5).astype(np.int32).view(np.uint32)
+    cells = row * np.uint32(width) + col
+    inside = (col < width) & (row < height)
+    return cells if inside.all() else cells[inside]
+
+
+def density_rows(cells, width, height):
+    """Row strings shading each cell by the number of balls in it"""
+    counts = np.bincount(cells, minlength=width * height)
+    grid = DENSITY_RAMP[np.searchsorted(DENSITY_STEPS, counts, side='right')]
+    return grid.view(f'<U{width}').tolist()
+
+
+class BallSwarm:
+    """Struct-of-arrays version of the bouncing, splitting balls
+
+    Each ball attribute (x, y, vx, vy) is a preallocated float32 array of
+    max_balls entries, and only the first `count` entries are in use.
+    Movement, wall reflection and splitting are masked array operations,
+    and new balls draw their velocities in one batch, so the swarm can
+    grow to 10^5 or 10^6 balls.
+
+    With collide set, balls also bounce off each other through a spatial
+    hash (see collisions.py). That is meant for thousands of balls; a
+    screen packed with millions is all contacts.
+    """
+    def __init__(self, width, height, max_balls=100000, speed=(0.5, 1.5), seed=None,
+                 collide=False, radius=0.5):
+        self.width = width
+        self.height = height
+        self.max_balls = max_balls
+        self.speed = speed
+        self.collide = collide
+        self.radius = radius
+        self.rng = np.random.default_rng(seed)
+
+        self.x = np.empty(max_balls, dtype=np.float32)
+        self.y = np.empty(max_balls, dtype=np.float32)
+        self.vx = np.empty(max_balls, dtype=np.float32)
+        self.vy = np.empty(max_balls, dtype=np.float32)
+        self.count = 0
+
+        # Grid every frame is drawn into
+        self.buffer = FrameBuffer(width, height)
+
+    def __len__(self):
+        return self.count
+
+    def resize(self, width, height):
+        """Move the walls, pulling any balls left outside back onto the screen"""
+        self.width = width
+        self.height = height
+        n = self.count
+        np.clip(self.x[:n], 0, width - 1, out=self.x[:n])
+        np.clip(self.y[:n], 0, height - 1, out=self.y[:n])
+        self.buffer.resize(width, height)
+
+    def random_speeds(self, count):
+        """Draw count speeds with a random sign"""
+        low, high = self.speed
+        speeds = self.rng.uniform(low, high, count).astype(np.float32)
+        return np.where(self.rng.random(count) < 0.5, -speeds, speeds)
+
+    def spawn(self, x, y):
+        """Add balls at the given positions, as many as there is room for"""
+        count = min(len(x), self.max_balls - self.count)
+        new = slice(self.count, self.count + count)
+        self.x[new] = x[:count]
+        self.y[new] = y[:count]
+        self.vx[new] = self.random_speeds(count)
+        self.vy[new] = self.random_speeds(count)
+        self.count += count
+        return count
+
+    def spawn_random(self, count):
+        """Add balls at random positions away from the walls"""
+        return self.spawn(self.rng.uniform(1, self.width - 2, count),
+                          self.rng.uniform(1, self.height - 2, count))
+
+    def reflect(self, pos, vel, limit):
+        """Bounce one axis off the walls at 0 and limit, returning the hits"""
+        low = pos <= 0
+        high = pos >= limit
+        hit = low | high
+        np.clip(pos, 0, limit, out=pos)
+        np.abs(vel, out=vel, where=hit)
+        np.negative(vel, out=vel, where=high)
+        return hit
+
+    def step(self):
+        """Advance every ball by one fixed simulation step"""
+        n = self.count
+        x, y, vx, vy = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n]
+        x += vx
+        y += vy
+        if self.collide:
+            resolve_collisions(x, y, vx, vy, self.width, self.height, self.radius)
+
+        hit = self.reflect(x, vx, self.width - 1)
+        hit |= self.reflect(y, vy, self.height - 1)
+
+        # Every ball that hit a wall splits while there is room
+        room = self.max_balls - self.count
+        if room:
+            split = np.flatnonzero(hit)[:room]
+            self.spawn(x[split], y[split])
+
+    def cells(self, alpha=0.0):
+        """Flat grid index of every ball on screen, interpolated alpha steps ahead"""
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        if alpha:
+            x = x + self.vx[:n] * alpha
+            y = y + self.vy[:n] * alpha
+        return grid_cells(x, y, self.width, self.height)
+
+    def draw(self, alpha=0.0, glyph='O'):
+        """Draw the swarm into a list of row strings"""
+        buffer = self.buffer
+        buffer.reset()
+        buffer.glyphs[self.cells(alpha)] = buffer.table.glyph(glyph)
+        return buffer.rows()
+
+    def draw_density(self, alpha=0.0):
+        """Draw the swarm with crowded cells shaded along DENSITY_RAMP"""
+        return density_rows(self.cells(alpha), self.width, self.height)
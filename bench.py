@@ -0,0 +1,450 @@
+"""Headless benchmarks for every demo
+
+Each demo runs for a fixed number of frames with its output going to a
+null sink that only counts bytes. Frame pacing is replaced by a timer,
+so the numbers show raw render cost across a sweep of resolutions and
+point densities (coin radius or ball count). Frame caches are off
+unless a run is marked cached.
+
+    python bench.py --frames 200 --output bench.json
+    python bench.py --demos highres matrix
+
+--coverage instead checks that culling empties no cell that is drawn without it.
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+import ball
+import coin
+import coin_high_res
+import coin_v2
+import mtx_coin
+import ring
+from ball_swarm import BallSwarm
+from frame_cache import FrameCache, rotation_period
+from framebuffer import FrameBuffer
+from screen import FrameDiffWriter
+
+
+class NullSink:
+    """Output stream that discards everything but counts the bytes"""
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, text):
+        self.bytes += len(text.encode('utf-8'))
+
+    def flush(self):
+        pass
+
+
+class FrameTimer:
+    """Stands in for FrameScheduler, recording each frame instead of pacing it"""
+    alpha = 0.0
+
+    def __init__(self, sink, warmup=5):
+        self.sink = sink
+        self.warmup = warmup
+        self.times = []
+        self.sizes = []
+        self.last_time = time.perf_counter()
+        self.last_bytes = 0
+
+    def wait(self):
+        now = time.perf_counter()
+        if self.warmup > 0:
+            self.warmup -= 1
+        else:
+            self.times.append(now - self.last_time)
+            self.sizes.append(self.sink.bytes - self.last_bytes)
+        self.last_time = now
+        self.last_bytes = self.sink.bytes
+        return 1
+
+    def sim_steps(self):
+        return 1
+
+
+class FakeCurses:
+    """The parts of the curses module the Matrix demo uses outside curses.wrapper"""
+    A_BOLD = 1 << 21
+    A_REVERSE = 1 << 18
+    KEY_LEFT = 260
+    KEY_RIGHT = 261
+    error = Exception
+
+    @staticmethod
+    def color_pair(number):
+        return number << 8
+
+    @staticmethod
+    def doupdate():
+        pass
+
+
+class FakeScreen:
+    """Curses screen that keeps cells in memory
+
+    refresh() and noutrefresh() push the cells through a FrameDiffWriter,
+    so the bytes a diffing terminal library would send end up in the sink.
+    """
+    def __init__(self, height, width, sink):
+        self.height = height
+        self.width = width
+        self.writer = FrameDiffWriter(sink)
+        self.clear()
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def clear(self):
+        self.chars = [[' '] * self.width for _ in range(self.height)]
+        self.attrs = [[()] * self.width for _ in range(self.height)]
+
+    erase = clear
+
+    def derwin(self, height, width, y, x):
+        if y < 0 or x < 0 or y + height > self.height or x + width > self.width:
+            raise FakeCurses.error('derwin() returned NULL')
+        return FakeWindow(self, height, width, y, x)
+
+    def addstr(self, y, x, text, attr=0):
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise FakeCurses.error('addstr() returned ERR')
+        for i, char in enumerate(text[:self.width - x]):
+            self.chars[y][x + i] = char
+            self.attrs[y][x + i] = (attr,) if attr else ()
+
+    def refresh(self):
+        self.writer.write_frame(self.chars, self.attrs)
+
+    noutrefresh = refresh
+
+
+class FakeWindow:
+    """Subwindow of a FakeScreen that writes straight into its cells"""
+    def __init__(self, parent, height, width, y, x):
+        self.parent = parent
+        self.height = height
+        self.width = width
+        self.y = y
+        self.x = x
+
+    def addstr(self, y, x, text, attr=0):
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise FakeCurses.error('addstr() returned ERR')
+        self.parent.addstr(self.y + y, self.x + x, text[:self.width - x], attr)
+
+    def noutrefresh(self):
+        pass
+
+
+@contextmanager
+def fake_curses():
+    """Swap the Matrix demo's curses module for FakeCurses"""
+    real = mtx_coin.curses
+    mtx_coin.curses = FakeCurses
+    try:
+        yield
+    finally:
+        mtx_coin.curses = real
+
+
+def frame_cache(cached):
+    """A frame cache, or one that stores nothing so every frame is rendered"""
+    return FrameCache() if cached else FrameCache(max_bytes=0)
+
+
+def mesh_points(geometry):
+    """Number of points in the most recently used cached mesh"""
+    mesh = next(reversed(geometry.entries.values()))
+    return len(mesh[0])
+
+
+def bench_coin(width, height, radius, frames, warmup, cached=False):
+    sink = NullSink()
+    timer = FrameTimer(sink, warmup)
+    coin.main(width, height, radius, frames=frames + warmup,
+              screen=FrameDiffWriter(sink), scheduler=timer, cache=frame_cache(cached))
+    return timer, None
+
+
+def bench_ring(width, height, frames, warmup, cached=False):
+    sink = NullSink()
+    timer = FrameTimer(sink, warmup)
+    ring.main(width, height, frames=frames + warmup,
+              screen=FrameDiffWriter(sink), scheduler=timer, cache=frame_cache(cached))
+    return timer, None
+
+
+def bench_advanced(width, height, radius, frames, warmup, cached=False, particles=30,
+                   particle_rate=0.3, subcell='cell'):
+    sink = NullSink()
+    timer = FrameTimer(sink, warmup)
+    demo = coin_v2.Advanced3DCoin()
+    demo.width, demo.height, demo.radius = width, height, radius
+    demo.max_particles, demo.particle_rate = particles, particle_rate
+    demo.subcell = subcell
+    demo.screen = FrameDiffWriter(sink)
+    demo.scheduler = timer
+    demo.frame_cache = frame_cache(cached)
+    demo.run(frames + warmup)
+    return timer, mesh_points(demo.geometry)
+
+
+def bench_highres(width, height, radius, frames, warmup, cached=False, subcell='cell'):
+    sink = NullSink()
+    timer = FrameTimer(sink, warmup)
+    demo = coin_high_res.HighResCoin()
+    demo.width, demo.height, demo.radius = width, height, radius
+    demo.subcell = subcell
+    demo.screen = FrameDiffWriter(sink)
+    demo.scheduler = timer
+    demo.frame_cache = frame_cache(cached)
+    demo.run(frames + warmup)
+    return timer, mesh_points(demo.geometry)
+
+
+def bench_matrix(width, height, radius, frames, warmup, workers=0, rain_density=0.25, rain_spawn=0.1):
+    sink = NullSink()
+    timer = FrameTimer(sink, warmup)
+    with fake_curses():
+        demo = mtx_coin.Matrix3DCoin(workers, rain_density, rain_spawn)
+        demo.coin_radius = radius
+        stdscr = FakeScreen(height, width, sink)
+        windows = demo.create_windows(height, width)
+        try:
+            for _ in range(frames + warmup):
+                demo.update(1, height, width)
+                demo.draw(stdscr, windows, 0)
+                demo.present(stdscr, windows)
+                demo.profiler.end_frame()
+                timer.wait()
+        finally:
+            demo.close()
+    return timer, mesh_points(demo.geometry)
+
+
+def bench_ball(width, height, balls, frames, warmup):
+    sink = NullSink()
+    timer = FrameTimer(sink, warmup)
+    screen = FrameDiffWriter(sink)
+    population = [ball.Ball(random.uniform(1, width - 2), random.uniform(1, height - 2),
+                            random.uniform(-1.5, 1.5), random.uniform(-1.5, 1.5))
+                  for _ in range(balls)]
+    buffer = FrameBuffer(width, height)
+    for _ in range(frames + warmup):
+        ball.update_balls(population, width, height, balls)
+        screen.write_frame(ball.draw_balls(population, width, height, buffer=buffer))
+        timer.wait()
+    return timer, balls
+
+
+def bench_swarm(width, height, balls, frames, warmup, collide=False, density=False):
+    sink = NullSink()
+    timer = FrameTimer(sink, warmup)
+    screen = FrameDiffWriter(sink)
+    swarm = BallSwarm(width, height, balls, seed=random.getrandbits(32), collide=collide)
+    swarm.spawn_random(balls)
+    draw = swarm.draw_density if density else swarm.draw
+    for _ in range(frames + warmup):
+        swarm.step()
+        screen.write_frame(draw())
+        timer.wait()
+    return timer, balls
+
+
+# Every demo with the resolutions and densities it is swept across
+BENCHMARKS = {
+    'coin': (bench_coin, [
+        {'width': 80, 'height': 24, 'radius': 10},
+        {'width': 160, 'height': 50, 'radius': 10},
+        {'width': 160, 'height': 50, 'radius': 20},
+        {'width': 160, 'height': 50, 'radius': 20, 'cached': True},
+    ]),
+    'ring': (bench_ring, [
+        {'width': 80, 'height': 24},
+        {'width': 160, 'height': 50},
+        {'width': 160, 'height': 50, 'cached': True},
+    ]),
+    'advanced': (bench_advanced, [
+        {'width': 120, 'height': 40, 'radius': 15},
+        {'width': 160, 'height': 50, 'radius': 15},
+        {'width': 160, 'height': 50, 'radius': 30},
+        {'width': 160, 'height': 50, 'radius': 30, 'cached': True},
+        {'width': 160, 'height': 50, 'radius': 30, 'cached': True, 'particles': 20000,
+         'particle_rate': 1000},
+        {'width': 160, 'height': 50, 'radius': 15, 'subcell': 'half'},
+        {'width': 160, 'height': 50, 'radius': 15, 'subcell': 'braille'},
+    ]),
+    'highres': (bench_highres, [
+        {'width': 160, 'height': 50, 'radius': 20},
+        {'width': 240, 'height': 70, 'radius': 20},
+        {'width': 240, 'height': 70, 'radius': 30},
+        {'width': 240, 'height': 70, 'radius': 30, 'cached': True},
+        {'width': 160, 'height': 50, 'radius': 20, 'subcell': 'half'},
+        {'width': 160, 'height': 50, 'radius': 20, 'subcell': 'braille'},
+    ]),
+    'matrix': (bench_matrix, [
+        {'width': 120, 'height': 40, 'radius': 12},
+        {'width': 200, 'height': 60, 'radius': 12},
+        {'width': 200, 'height': 60, 'radius': 24},
+        {'width': 200, 'height': 60, 'radius': 24, 'workers': 4},
+        {'width': 300, 'height': 80, 'radius': 12, 'rain_density': 1, 'rain_spawn': 4},
+    ]),
+    'ball': (bench_ball, [
+        {'width': 80, 'height': 24, 'balls': 100},
+        {'width': 200, 'height': 60, 'balls': 100},
+        {'width': 200, 'height': 60, 'balls': 1000},
+    ]),
+    'swarm': (bench_swarm, [
+        {'width': 200, 'height': 60, 'balls': 1000},
+        {'width': 200, 'height': 60, 'balls': 100000},
+        {'width': 200, 'height': 60, 'balls': 1000000},
+    ]),
+    'collide': (bench_swarm, [
+        {'width': 200, 'height': 60, 'balls': 1000, 'collide': True},
+        {'width': 200, 'height': 60, 'balls': 5000, 'collide': True},
+    ]),
+    'density': (bench_swarm, [
+        {'width': 200, 'height': 60, 'balls': 1000, 'density': True},
+        {'width': 200, 'height': 60, 'balls': 100000, 'density': True},
+        {'width': 200, 'height': 60, 'balls': 1000000, 'density': True},
+    ]),
+}
+
+
+def coverage_advanced(width, height, radius, subcell='cell'):
+    """Cells Advanced3DCoin's culling leaves empty, for every frame of a rotation
+
+    Like coverage_highres, over the period of the rotation and the pulse.
+    """
+    demo = coin_v2.Advanced3DCoin()
+    demo.width, demo.height, demo.radius, demo.subcell = width, height, radius, subcell
+    period, speeds = rotation_period((demo.rotation_speed_x, demo.rotation_speed_y,
+                                      demo.rotation_speed_z, demo.pulse_speed))
+    lost = []
+    for phase in range(period):
+        *angles, demo.pulse_angle = (phase * speed % (2 * math.pi) for speed in speeds)
+        demo.angle_x, demo.angle_y, demo.angle_z = angles
+        demo.culling = False
+        demo.render_coin()
+        drawn = np.isfinite(demo.buffer.depth)
+        demo.culling = True
+        demo.render_coin()
+        lost.append(int((drawn & np.isinf(demo.buffer.depth)).sum()))
+    return lost
+
+
+def coverage_highres(width, height, radius, subcell='cell'):
+    """Cells HighResCoin's culling leaves empty, for every frame of a rotation
+
+    Each phase of the rotation period is rendered with and without
+    primitive group culling, counting the cells (or samples, in a
+    sub-cell mode) that only the render without it draws anything into.
+    """
+    demo = coin_high_res.HighResCoin()
+    demo.width, demo.height, demo.radius, demo.subcell = width, height, radius, subcell
+    period, speeds = rotation_period((demo.speed_x, demo.speed_y, demo.speed_z))
+    lost = []
+    for phase in range(period):
+        demo.angle_x, demo.angle_y, demo.angle_z = (phase * speed % (2 * math.pi) for speed in speeds)
+        demo.culling = False
+        demo.render_frame()
+        drawn = np.isfinite(demo.buffer.depth)
+        demo.culling = True
+        demo.render_frame()
+        lost.append(int((drawn & np.isinf(demo.buffer.depth)).sum()))
+    return lost
+
+
+# Sizes each coin's culling is checked at, over a whole rotation
+COVERAGE = {
+    'advanced': (coverage_advanced, [
+        {'width': 120, 'height': 40, 'radius': 15},
+        {'width': 160, 'height': 50, 'radius': 15},
+        {'width': 160, 'height': 50, 'radius': 30},
+        {'width': 160, 'height': 50, 'radius': 15, 'subcell': 'half'},
+        {'width': 160, 'height': 50, 'radius': 15, 'subcell': 'braille'},
+    ]),
+    'highres': (coverage_highres, [
+        {'width': 160, 'height': 50, 'radius': 10},
+        {'width': 160, 'height': 50, 'radius': 20},
+        {'width': 160, 'height': 50, 'radius': 30},
+        {'width': 240, 'height': 70, 'radius': 30},
+        {'width': 160, 'height': 50, 'radius': 20, 'subcell': 'braille'},
+    ]),
+}
+
+
+def summarize(timer):
+    """Frame rate and timing statistics for one run"""
+    times = sorted(timer.times)
+    total = sum(times)
+    return {
+        'frames': len(times),
+        'fps': len(times) / total if total else float('inf'),
+        'mean_ms': 1000 * total / len(times),
+        'p99_ms': 1000 * times[min(len(times) - 1, int(0.99 * len(times)))],
+        'bytes_per_frame': sum(timer.sizes) / len(timer.sizes),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=100, help='measured frames per run')
+    parser.add_argument('--warmup', type=int, default=5, help='unmeasured frames before each run')
+    parser.add_argument('--demos', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--output', default='bench.json', help='JSON results file')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--coverage', action='store_true',
+                        help='check culling over a rotation instead of timing')
+    args = parser.parse_args(argv)
+    if args.frames < 1:
+        parser.error('--frames must be at least 1')
+
+    if args.coverage:
+        failed = False
+        for name in args.demos:
+            if name not in COVERAGE:
+                continue
+            check, sweep = COVERAGE[name]
+            for params in sweep:
+                lost = check(**params)
+                failed = failed or any(lost)
+                print(f"{name:9} {' '.join(f'{k}={v}' for k, v in params.items()):32} "
+                      f"{len(lost):5} frames  {sum(map(bool, lost)):5} with lost cells  "
+                      f"max {max(lost):4} lost")
+        raise SystemExit(failed)
+
+    results = []
+    for name in args.demos:
+        bench, sweep = BENCHMARKS[name]
+        for params in sweep:
+            random.seed(args.seed)
+            timer, points = bench(frames=args.frames, warmup=args.warmup, **params)
+            result = {'demo': name, **params, 'points': points, **summarize(timer)}
+            results.append(result)
+            print(f"{name:9} {' '.join(f'{k}={v}' for k, v in params.items()):32} "
+                  f"{result['fps']:9.1f} fps  mean {result['mean_ms']:7.2f} ms  "
+                  f"p99 {result['p99_ms']:7.2f} ms  {result['bytes_per_frame']:9.0f} B/frame")
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'frames': args.frames,
+            'warmup': args.warmup,
+            'results': results,
+        }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,75 +1,65 @@
-import os
-import sys
-import time
 import math
 
-def clear_screen():
-    # Clear the terminal screen
-    sys.stdout.write('\033[2J')
-    sys.stdout.write('\033[H')
-    sys.stdout.flush()
+from frame_cache import FrameCache, rotation_period
+from framebuffer import FrameBuffer
+from raster import disc_cells
+from scheduler import FrameScheduler
+from screen import FrameDiffWriter
 
-def main():
-    # Terminal dimensions (adjust if necessary)
-    width = 80
-    height = 24
+def render_frame(angle, width, height, radius, buffer=None):
+    # Draw into the caller's buffer, reused from frame to frame
+    if buffer is None:
+        buffer = FrameBuffer(width, height)
+    buffer.resize(width, height)
+    buffer.reset()
 
-    # Coin parameters
-    radius = 10  # Radius of the coin
-    angle_increment = 0.1  # Rotation speed
+    # The coin's face, rotated around the vertical (z) axis
+    cos_angle = math.cos(angle)
+    sin_angle = math.sin(angle)
+    axis_u = (radius * cos_angle, radius * sin_angle, 0)
+    axis_v = (-radius * sin_angle, radius * cos_angle, 0)
 
-    try:
-        angle = 0.0
-        while True:
-            clear_screen()
-            output = [[' ' for _ in range(width)] for _ in range(height)]
-            zbuffer = [[float('-inf') for _ in range(width)] for _ in range(height)]
+    # Perspective projection
+    K1 = 20  # Scaling factor
+    viewer_distance = 50  # Distance from the viewer
+    camera = (width / 2, height / 2, K1, -K1, -1, viewer_distance)  # Inverted y-axis
 
-            # Loop over points on the coin's surface
-            for theta in frange(0, 2 * math.pi, 0.05):
-                for r in frange(-radius, radius, 0.5):
-                    x = r * math.cos(theta)
-                    y = r * math.sin(theta)
-                    z = 0
+    # Fill the projected disc a scanline at a time
+    cells, _, _, _ = disc_cells((0, 0, 0), axis_u, axis_v, camera, width, height)
+    buffer.glyphs[cells] = buffer.table.glyph('O')
+    return buffer.rows()
 
-                    # Rotate around the vertical (z) axis
-                    cos_angle = math.cos(angle)
-                    sin_angle = math.sin(angle)
-                    x_rot = x * cos_angle - y * sin_angle
-                    y_rot = x * sin_angle + y * cos_angle
-                    z_rot = z
+def main(width=80, height=24, radius=10, frames=None, screen=None, scheduler=None, cache=None):
+    # Terminal dimensions (adjust if necessary) and coin radius are
+    # parameters so the demo can also run headless for a fixed number
+    # of frames
 
-                    # Perspective projection
-                    K1 = 20  # Scaling factor
-                    viewer_distance = 50  # Distance from the viewer
-                    ooz = 1 / (viewer_distance - z_rot)
-                    xp = int(width / 2 + x_rot * K1 * ooz)
-                    yp = int(height / 2 - y_rot * K1 * ooz)  # Inverted y-axis for correct orientation
+    # Coin parameters, with the speed snapped so a turn takes whole frames
+    period, (angle_increment,) = rotation_period([0.1])  # Rotation speed
 
-                    # Check boundaries and update output
-                    if 0 <= xp < width and 0 <= yp < height:
-                        if ooz > zbuffer[yp][xp]:
-                            zbuffer[yp][xp] = ooz
-                            output[yp][xp] = 'O'
+    # Only the cells that change between frames are written
+    screen = screen or FrameDiffWriter()
+    scheduler = scheduler or FrameScheduler(fps=20)
+    # After the first turn every frame is replayed from memory
+    cache = FrameCache() if cache is None else cache
+    # Frames are drawn into the same planes every time
+    buffer = FrameBuffer(width, height)
 
+    try:
+        frame = 0
+        while frames is None or frame < frames:
             # Render the frame
-            for row in output:
-                print(''.join(row))
+            phase = frame % period
+            output = cache.get((width, height, radius, phase), render_frame,
+                               phase * angle_increment, width, height, radius, buffer)
+            screen.write_frame(output)
 
-            # Update rotation angle
-            angle += angle_increment
-            if angle >= 2 * math.pi:
-                angle -= 2 * math.pi
-
-            time.sleep(0.05)
+            # Wait for the next frame, skipping any we fell behind on
+            frame += scheduler.wait()
     except KeyboardInterrupt:
         pass  # Allow the user to exit with Ctrl+C
-
-def frange(start, stop, step):
-    # Floating point range generator
-    while start < stop:
-        yield start
-        start += step
+    finally:
+        screen.close()
 
 if __name__ == '__main__':
     main()
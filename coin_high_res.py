@@ -1,15 +1,27 @@
-import os
-import sys
-import time
+import argparse
 import math
 import numpy as np
 
+from culling import RIM_SEGMENTS, PrimitiveGroups, disc_outline
+from frame_cache import FrameCache, rotation_period
+from framebuffer import SUBCELL_MODES, FrameBuffer, GlyphTable
+from geometry import GeometryCache, axis_length, detail_level, layer_level, outline_length
+from lighting import LightingLUT, brightness_buckets, bucket_centres
+from raster import disc_cells
+from scheduler import FrameScheduler
+from screen import FrameDiffWriter
+from transform import rotate_points, rotation_matrix
+
 class HighResCoin:
     def __init__(self):
         # Terminal settings - much higher resolution
         self.width = 160
         self.height = 50
         
+        # Samples per cell: 'cell', or 'half' and 'braille' for half
+        # blocks and braille dots (see framebuffer.SUBCELL_MODES)
+        self.subcell = 'cell'
+        
         # Coin parameters
         self.radius = 20
         self.thickness = 0.15  # Relative thickness
@@ -45,9 +57,41 @@ class HighResCoin:
             'face_sad': '︵'
         }
         
-    def clear_screen(self):
-        """Clear terminal screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        # Glyph table for the vectorized renderer (index 0 is blank)
+        self.point_types = ('front', 'back', 'rim', 'eye', 'mouth', 'tear')
+        self.glyph_lut = np.array(list(dict.fromkeys(' █▓▒░·●○‿︵│║─═' + self.gradient)))
+        self.glyph_index = {char: i for i, char in enumerate(self.glyph_lut)}
+        self.gradient_lut = np.array([self.glyph_index[char] for char in self.gradient])
+        # glyph_lut indices are the glyphs' numbers in the frame buffers
+        self.glyphs = GlyphTable(''.join(self.glyph_lut))
+        
+        # Coin meshes, kept for every level of detail a rotation goes
+        # through, so they are only rebuilt when radius or thickness change
+        self.geometry = GeometryCache(max_entries=32)
+        
+        # Rendered frames, replayed once the rotation comes back around
+        self.frame_cache = FrameCache()
+        
+        # Skip primitive groups that can not be seen; only turned off to
+        # check what culling drops
+        self.culling = True
+        
+        # Glyph and depth planes every frame is drawn into, and the whole
+        # screen with its border
+        self.buffer = FrameBuffer(self.width, self.height, self.glyphs, mode=self.subcell)
+        self.screen_buffer = FrameBuffer(self.width + 2, self.height + 2, self.glyphs)
+        self.palette = [()]
+        
+        # Light from the top right, precomputed over normal directions
+        self.light = np.array([1, -1, -2]) / np.linalg.norm([1, -1, -2])
+        self.lighting = LightingLUT(self.light_normals)
+        
+        # Glyph for every point type, variant and brightness bucket
+        self.glyph_table = self.compile_glyph_table()
+        
+        # Terminal output that only rewrites changed cells
+        self.screen = FrameDiffWriter()
+        self.scheduler = FrameScheduler(fps=30)
     
     def bresenham_circle(self, center_x, center_y, radius, z=0):
         """Generate circle points using Bresenham's algorithm for smooth edges"""
@@ -79,33 +123,6 @@ class HighResCoin:
                 
         return points
     
-    def generate_filled_circle(self, center_x, center_y, radius, z=0):
-        """Generate a filled circle with anti-aliasing"""
-        points = []
-        
-        # Use supersampling for smoother edges
-        for y in range(-radius, radius + 1):
-            for x in range(-radius, radius + 1):
-                # Calculate distance from center
-                dist = math.sqrt(x*x + y*y)
-                
-                if dist <= radius:
-                    # Anti-aliasing: calculate intensity based on distance to edge
-                    edge_dist = radius - dist
-                    if edge_dist < 1:
-                        intensity = edge_dist  # Smooth edge
-                    else:
-                        intensity = 1.0  # Solid interior
-                    
-                    points.append((
-                        center_x + x,
-                        center_y + y,
-                        z,
-                        intensity
-                    ))
-                    
-        return points
-    
     def create_face_points(self, face_type='happy'):
         """Create high-resolution face with clear features"""
         points = []
@@ -143,201 +160,301 @@ class HighResCoin:
                 
         return points
     
-    def generate_3d_coin(self):
-        """Generate complete 3D coin with high resolution"""
-        points = []
-        
-        # Generate main coin body - front and back faces
-        front_circle = self.generate_filled_circle(0, 0, self.radius, self.thickness * self.radius)
-        back_circle = self.generate_filled_circle(0, 0, self.radius, -self.thickness * self.radius)
+    def generate_3d_coin(self, rim_resolution=120, rim_layers=5):
+        """Generate the coin's rim and face features with high resolution
         
-        # Add faces with proper depth
-        points.extend([(x, y, z, 'front', intensity) for x, y, z, intensity in front_circle])
-        points.extend([(x, y, z, 'back', intensity) for x, y, z, intensity in back_circle])
-        
-        # Generate rim (edge) with high detail
-        rim_resolution = 120  # High resolution for smooth edge
-        for i in range(rim_resolution):
-            angle = 2 * math.pi * i / rim_resolution
-            x = self.radius * math.cos(angle)
-            y = self.radius * math.sin(angle)
-            
-            # Create thickness with multiple layers
-            for z_layer in np.linspace(-self.thickness * self.radius, self.thickness * self.radius, 5):
-                points.append((x, y, z_layer, 'rim', 1.0))
+        Returns the rim as a (rim_resolution, rim_layers, 3) grid of points
+        around and across it, with the first and last layers on the edges
+        of the faces, and the face features as (x, y, z, feature) points.
+        The front and back faces are solid discs, which render_frame fills
+        with the scanline rasterizer instead of sampling them as points.
+        """
+        depth = self.thickness * self.radius
         
-        # Add face features
-        happy_face = self.create_face_points('happy')
-        sad_face = self.create_face_points('sad')
+        # Generate rim (edge), one column of layers per angle
+        angle = 2 * np.pi * np.arange(rim_resolution) / rim_resolution
+        rim = np.empty((rim_resolution, rim_layers, 3))
+        rim[..., 0] = self.radius * np.cos(angle)[:, None]
+        rim[..., 1] = self.radius * np.sin(angle)[:, None]
+        rim[..., 2] = np.linspace(-depth, depth, rim_layers)
         
-        # Adjust face positions to be on coin surfaces
-        for x, y, z, feature in happy_face:
-            points.append((x, y, self.thickness * self.radius + z, feature, 1.0))
+        # Add face features, adjusted to be on coin surfaces
+        points = []
+        for x, y, z, feature in self.create_face_points('happy'):
+            points.append((x, y, depth + z, feature))
         
-        for x, y, z, feature in sad_face:
-            points.append((x, y, -self.thickness * self.radius + z, feature, 1.0))
+        for x, y, z, feature in self.create_face_points('sad'):
+            points.append((x, y, -depth + z, feature))
             
-        return points
+        return rim, points
     
-    def rotate_3d(self, x, y, z):
-        """Apply 3D rotation with proper matrix multiplication"""
-        # Rotation matrix X
-        cos_x, sin_x = math.cos(self.angle_x), math.sin(self.angle_x)
-        y, z = y * cos_x - z * sin_x, y * sin_x + z * cos_x
+    def light_normals(self, normals):
+        """Diffuse plus ambient lighting for an (N,3) array of unit normals"""
+        diffuse = np.maximum(0, normals @ self.light)
+        ambient = 0.3
+        return np.minimum(1, ambient + diffuse * 0.7)
+    
+    def build_point_cloud(self, rim_resolution=120, rim_layers=5):
+        """Pack the coin points into (N,3) arrays for batched rendering
+        
+        Points are ordered by primitive group (rim segments, the rim's
+        edges along each face, then the features on each side), and the
+        groups also bound the two faces.
+        """
+        depth = self.thickness * self.radius
+        rim, features = self.generate_3d_coin(rim_resolution, rim_layers)
         
-        # Rotation matrix Y
-        cos_y, sin_y = math.cos(self.angle_y), math.sin(self.angle_y)
-        x, z = x * cos_y + z * sin_y, -x * sin_y + z * cos_y
+        # Rim points face straight out from the axis. The edges where the
+        # rim meets a face outline the face, so their normals also take in
+        # the face's and they are kept while either of the two faces the
+        # eye. Features stand off the face and may show past its edge, so
+        # they get no common direction and are only culled off the screen
+        rim_kind = self.point_types.index('rim')
+        segment = np.arange(rim_resolution) * RIM_SEGMENTS // rim_resolution
+        parts = []
+        for i in range(RIM_SEGMENTS):
+            points = rim[segment == i, 1:-1].reshape(-1, 3)
+            parts.append((('rim', i), points, rim_kind, points * (1, 1, 0)))
+        for front, layer in ((False, 0), (True, -1)):
+            for i in range(RIM_SEGMENTS):
+                points = rim[segment == i, layer]
+                parts.append((('edge', front, i), points, rim_kind,
+                              np.vstack((points * (1, 1, 0), [(0, 0, 1 if front else -1)]))))
+        for label, front in (('front features', True), ('back features', False)):
+            side = [point for point in features if (point[2] > 0) == front]
+            parts.append((label, np.array([point[:3] for point in side], dtype=np.float64).reshape(-1, 3),
+                          [self.point_types.index(point[3]) for point in side], [(0, 0, 1), (0, 0, -1)]))
+        parts = [part for part in parts if len(part[1])]
         
-        # Rotation matrix Z
-        cos_z, sin_z = math.cos(self.angle_z), math.sin(self.angle_z)
-        x, y = x * cos_z - y * sin_z, x * sin_z + y * cos_z
+        # One run of points per group
+        xyz = np.concatenate([points for _, points, _, _ in parts])
+        kinds = np.concatenate([np.broadcast_to(np.asarray(kind, dtype=np.int8), len(points))
+                                for _, points, kind, _ in parts])
+        intensity = np.ones(len(xyz))
+        stops = np.cumsum([len(points) for _, points, _, _ in parts]).tolist()
+        groups = [(label, stop - len(points), stop, points, normals)
+                  for (label, points, _, normals), stop in zip(parts, stops)]
+        for face, z in (('front', depth), ('back', -depth)):
+            groups.append((face, 0, 0, disc_outline(z, self.radius), [(0, 0, np.sign(z))]))
         
-        return x, y, z
+        # The arrays are shared across frames, so guard them against edits
+        for array in (xyz, kinds, intensity):
+            array.flags.writeable = False
+        return xyz, kinds, intensity, PrimitiveGroups(groups)
     
-    def calculate_lighting(self, x, y, z, normal_z):
-        """Calculate lighting with proper shading"""
-        # Light vector (from top-right)
-        light = np.array([1, -1, -2])
-        light = light / np.linalg.norm(light)
-        
-        # Surface normal approximation
-        if abs(x) + abs(y) > 0:
-            normal = np.array([x, y, normal_z * self.radius])
-            normal = normal / np.linalg.norm(normal)
-        else:
-            normal = np.array([0, 0, -1 if normal_z < 0 else 1])
+    def rotation_matrix(self):
+        """Composed rotation matrix for the current frame"""
+        return rotation_matrix(self.angle_x, self.angle_y, self.angle_z)
+    
+    def shade_points(self, xyz):
+        """Lighting for every rotated point, looked up from the lighting map"""
+        # The lookup only needs the normal's direction, so the normals are
+        # not normalized, and points on the axis point straight up or down
+        normal_z = np.where(xyz[:, 2] > 0, self.radius, -self.radius)
+        return self.lighting.lookup(np.column_stack((xyz[:, 0], xyz[:, 1], normal_z)))
+    
+    def compile_glyph_table(self):
+        """Glyph ladders compiled into a (type, variant, bucket) table of glyph_lut indices
         
-        # Calculate diffuse lighting
-        diffuse = max(0, np.dot(normal, light))
+        The variant is the intensity band (faint, edge, solid) for face
+        points, the orientation for rim points and the side for mouths.
+        """
+        glyph = self.glyph_index
+        brightness = bucket_centres()
+        bright = brightness > 0.5
+        table = np.full((len(self.point_types), 3, len(brightness)), glyph['·'], dtype=np.intp)
         
-        # Add ambient light
-        ambient = 0.3
-        brightness = min(1, ambient + diffuse * 0.7)
+        # Solid interior ladder and anti-aliased edge gradient for the faces
+        ladder = np.select(
+            [brightness > 0.8, brightness > 0.6, brightness > 0.4, brightness > 0.2],
+            [glyph['█'], glyph['▓'], glyph['▒'], glyph['░']],
+            glyph['·'])
+        gradient = self.gradient_lut[(brightness * (len(self.gradient) - 1)).astype(np.intp)]
+        for kind in ('front', 'back'):
+            table[self.point_types.index(kind)] = [np.full_like(ladder, glyph['░']), gradient, ladder]
         
-        return brightness
+        rim = self.point_types.index('rim')
+        table[rim, 0] = np.where(bright, glyph['║'], glyph['│'])
+        table[rim, 1] = np.where(bright, glyph['═'], glyph['─'])
+        
+        table[self.point_types.index('eye')] = np.where(bright, glyph['●'], glyph['○'])
+        table[self.point_types.index('mouth'), 0] = glyph['‿']
+        table[self.point_types.index('mouth'), 1] = glyph['︵']
+        table[self.point_types.index('tear')] = glyph['│']
+        return table
+    
+    def select_glyphs(self, xyz, kinds, intensity, brightness):
+        """Map point type and brightness to indices into glyph_lut"""
+        x, y, z = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+        variant = np.select(
+            [kinds <= self.point_types.index('back'),
+             kinds == self.point_types.index('rim'),
+             kinds == self.point_types.index('mouth')],
+            [(intensity >= 0.3).astype(np.intp) + (intensity >= 0.7),
+             np.abs(x) <= np.abs(y),
+             z <= 0],
+            0)
+        return self.glyph_table[kinds, variant, brightness_buckets(brightness)]
+    
+    def face_cells(self, matrix, camera, width, height, faces=('front', 'back')):
+        """Rasterize the front and back faces, or just the given ones, into per-cell candidates
+        
+        Returns the same (cell, depth, xyz, kinds, intensity) arrays the
+        projected points give, with the faces first, on a width x height
+        grid of cells or samples.
+        """
+        radius = self.radius
+        axis_u = matrix @ (radius, 0, 0)
+        axis_v = matrix @ (0, radius, 0)
+        parts = [(np.zeros(0, dtype=np.intp), np.zeros(0), np.zeros((0, 3)),
+                  np.zeros(0, dtype=np.int8), np.zeros(0))]
+        for kind, z in (('front', self.thickness * radius), ('back', -self.thickness * radius)):
+            if kind not in faces:
+                continue
+            center = matrix @ (0, 0, z)
+            cells, depth, u, v = disc_cells(center, axis_u, axis_v, camera, width, height)
+            xyz = center + np.outer(u, axis_u) + np.outer(v, axis_v)
+            # Anti-aliasing: intensity falls off within a unit of the edge
+            intensity = np.minimum(1, radius * (1 - np.hypot(u, v)))
+            parts.append((cells, depth, xyz, np.full(len(cells), self.point_types.index(kind),
+                                                     dtype=np.int8), intensity))
+        return [np.concatenate(arrays) for arrays in zip(*parts)]
     
     def render_frame(self):
         """Render a single frame with high quality"""
-        # Create buffers
-        buffer = [[' ' for _ in range(self.width)] for _ in range(self.height)]
-        zbuffer = [[float('-inf') for _ in range(self.width)] for _ in range(self.height)]
-        
-        # Generate coin points
-        coin_points = self.generate_3d_coin()
+        # Render on the sample grid of the sub-cell mode
+        buffer = self.buffer
+        buffer.resize(self.width, self.height, self.subcell)
+        buffer.reset()
+        across, down = buffer.across, buffer.down
+        width, height = buffer.sample_width, buffer.sample_height
         
         # Camera distance
         camera_z = 60
+        camera = (width / 2, height / 2, camera_z * 2 * across, camera_z * down, 1, camera_z)
+        matrix = self.rotation_matrix()
         
-        # Render each point
-        for point in coin_points:
-            x, y, z = point[0], point[1], point[2]
-            point_type = point[3] if len(point) > 3 else 'front'
-            intensity = point[4] if len(point) > 4 else 1.0
-            
-            # Apply rotation
-            x, y, z = self.rotate_3d(x, y, z)
-            
-            # Perspective projection
-            if z + camera_z <= 0:
-                continue
-                
-            factor = camera_z / (z + camera_z)
-            screen_x = int(self.width / 2 + x * factor * 2)
-            screen_y = int(self.height / 2 + y * factor)
-            
-            # Bounds check
-            if 0 <= screen_x < self.width and 0 <= screen_y < self.height:
-                depth = 1 / (z + camera_z)
-                
-                if depth > zbuffer[screen_y][screen_x]:
-                    zbuffer[screen_y][screen_x] = depth
-                    
-                    # Calculate lighting
-                    brightness = self.calculate_lighting(x, y, z, 1 if z > 0 else -1)
-                    brightness *= intensity  # Apply anti-aliasing intensity
-                    
-                    # Choose character based on type and brightness
-                    if point_type == 'eye':
-                        char = '●' if brightness > 0.5 else '○'
-                    elif point_type == 'mouth':
-                        char = '‿' if z > 0 else '︵'
-                    elif point_type == 'tear':
-                        char = '│'
-                    elif point_type == 'rim':
-                        # Edge should be clearly defined
-                        if abs(x) > abs(y):
-                            char = '║' if brightness > 0.5 else '│'
-                        else:
-                            char = '═' if brightness > 0.5 else '─'
-                    elif point_type in ['front', 'back']:
-                        # Use gradient for smooth shading
-                        if intensity < 0.3:  # Near edge
-                            char = '░'
-                        elif intensity < 0.7:
-                            idx = int(brightness * (len(self.gradient) - 1))
-                            char = self.gradient[idx]
-                        else:  # Solid interior
-                            if brightness > 0.8:
-                                char = '█'
-                            elif brightness > 0.6:
-                                char = '▓'
-                            elif brightness > 0.4:
-                                char = '▒'
-                            elif brightness > 0.2:
-                                char = '░'
-                            else:
-                                char = '·'
-                    else:
-                        char = '·'
-                    
-                    buffer[screen_y][screen_x] = char
-        
-        return buffer
+        # Sample the rim at least once per cell or sample it projects to:
+        # twice per cell of its outline around it, as the samples land
+        # sheared across the rim, and once per cell across it
+        scale = camera_z / max(camera_z - self.radius, 1)  # Scale of the nearest rim point
+        scale_x, scale_y = scale * 2 * across, scale * down
+        rim_resolution = detail_level(outline_length(matrix, self.radius, scale_x, scale_y), width, height,
+                                      per_cell=2)
+        rim_layers = layer_level(axis_length(matrix, 2 * self.thickness * self.radius, scale_x, scale_y))
+        xyz, kinds, intensity, groups = self.geometry.get(
+            (self.radius, self.thickness, rim_resolution, rim_layers),
+            self.build_point_cloud, rim_resolution, rim_layers)
+        
+        # Drop the groups that face away or fall off the screen before any
+        # per-point work
+        if self.culling:
+            visible = groups.visible(matrix, camera, width, height)
+        else:
+            visible = np.ones(len(groups.starts), dtype=bool)
+        faces = [face for face in ('front', 'back') if visible[groups.index[face]]]
+        shown = groups.select(visible)
+        
+        # Rotate every remaining point with one matrix multiply
+        xyz = rotate_points(xyz[shown], matrix)
+        kinds, intensity = kinds[shown], intensity[shown]
+        
+        # Perspective projection, culling points behind the camera
+        visible = xyz[:, 2] + camera_z > 0
+        xyz, kinds, intensity = xyz[visible], kinds[visible], intensity[visible]
+        dist = xyz[:, 2] + camera_z
+        factor = camera_z / dist
+        screen_x = (width / 2 + xyz[:, 0] * factor * 2 * across).astype(np.intp)
+        screen_y = (height / 2 + xyz[:, 1] * factor * down).astype(np.intp)
+        
+        # Bounds check
+        inside = (screen_x >= 0) & (screen_x < width) & (screen_y >= 0) & (screen_y < height)
+        
+        # The faces are filled scanline by scanline and go first, then the points
+        face_cell, face_depth, face_xyz, face_kinds, face_intensity = self.face_cells(
+            matrix, camera, width, height, faces)
+        cell = np.concatenate((face_cell, (screen_y * width + screen_x)[inside]))
+        depth = np.concatenate((face_depth, 1 / dist[inside]))
+        xyz = np.concatenate((face_xyz, xyz[inside]))
+        kinds = np.concatenate((face_kinds, kinds[inside]))
+        intensity = np.concatenate((face_intensity, intensity[inside]))
+        
+        # Resolve the z-buffer with a scatter-max, keeping the first one on ties
+        cells, winners = buffer.depth_test(cell, depth)
+        
+        # Shade only the surviving points
+        brightness = self.shade_points(xyz[winners]) * intensity[winners]
+        if buffer.mode == 'cell':
+            buffer.glyphs[cells] = self.select_glyphs(xyz[winners], kinds[winners], intensity[winners],
+                                                      brightness)
+        else:
+            # Dots can not draw the features' glyphs, so the features are
+            # cut out of the face instead
+            feature = kinds[winners] > self.point_types.index('rim')
+            buffer.levels[cells] = np.where(feature, 0, brightness)
+            buffer.pack(cells, attrs=False)
+        
+        # Keep just the glyph and attribute planes; text is made on output
+        return buffer.frame()
     
-    def draw_frame(self, buffer):
+    def draw_frame(self, frame):
         """Draw the frame with proper formatting"""
+        glyphs, attrs = frame
+        screen = self.screen_buffer
+        screen.resize(self.width + 2, self.height + 2)
+        screen.reset()
+        
         # Top border
-        print('╔' + '═' * (self.width - 2) + '╗')
+        screen.put(0, 0, '╔' + '═' * (self.width - 2) + '╗')
         
         # Content with side borders
-        for row in buffer:
-            print('║' + ''.join(row) + '║')
+        screen_glyphs, screen_attrs = screen.planes()
+        screen_glyphs[1:-1, 1:-1] = glyphs
+        screen_attrs[1:-1, 1:-1] = attrs
+        screen_glyphs[1:-1, [0, -1]] = self.glyphs.glyph('║')
         
         # Bottom border with info
         info = f" Frame: {self.frame} | Rotation: X:{self.angle_x:.2f} Y:{self.angle_y:.2f} Z:{self.angle_z:.2f} "
         bottom = '╚' + '═' * ((self.width - len(info)) // 2 - 1)
         bottom += info
         bottom += '═' * (self.width - len(bottom) - 1) + '╝'
-        print(bottom[:self.width])
+        screen.put(self.height + 1, 0, bottom[:self.width])
+        
+        self.screen.write_planes(screen_glyphs, screen_attrs, self.glyphs, self.palette)
     
-    def run(self):
-        """Main animation loop"""
+    def run(self, frames=None):
+        """Main animation loop, optionally stopping after a number of frames"""
+        start_frame = self.frame
+        elapsed = 1
+        
+        # Snap the speeds so all three rotations realign after period frames
+        period, speeds = rotation_period((self.speed_x, self.speed_y, self.speed_z))
         try:
-            while True:
-                self.clear_screen()
-                
-                # Update rotation
-                self.angle_x += self.speed_x
-                self.angle_y += self.speed_y
-                self.angle_z += self.speed_z
-                self.frame += 1
-                
-                # Keep angles in range
-                self.angle_x %= (2 * math.pi)
-                self.angle_y %= (2 * math.pi)
-                self.angle_z %= (2 * math.pi)
+            while frames is None or self.frame - start_frame < frames:
+                # Update rotation, including any skipped frames
+                self.frame += elapsed
+                phase = self.frame % period
+                self.angle_x, self.angle_y, self.angle_z = (phase * speed % (2 * math.pi) for speed in speeds)
                 
-                # Render and display
-                buffer = self.render_frame()
-                self.draw_frame(buffer)
+                # Render and display, replaying frames seen in earlier periods
+                key = (self.width, self.height, self.subcell, self.radius, self.thickness, phase)
+                frame = self.frame_cache.get(key, self.render_frame)
+                self.draw_frame(frame)
                 
-                # Control frame rate
-                time.sleep(0.03)
+                # Wait for the next frame deadline
+                elapsed = self.scheduler.wait()
                 
         except KeyboardInterrupt:
+            self.screen.close()
             print("\n✨ Coin animation stopped ✨")
+            return
+        self.screen.close()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="High resolution spinning coin")
+    parser.add_argument('--subcell', choices=SUBCELL_MODES, default='cell',
+                        help="draw with half blocks or braille dots for more resolution")
+    args = parser.parse_args()
     coin = HighResCoin()
+    coin.subcell = args.subcell
     coin.run()
\ No newline at end of file
@@ -1,9 +1,20 @@
-import os
-import sys
-import time
+import argparse
 import math
 import random
-from collections import deque
+
+import numpy as np
+
+from culling import PrimitiveGroups, disc_outline, group_points, rim_segment
+from frame_cache import FrameCache, rotation_period
+from framebuffer import SUBCELL_MODES, FrameBuffer, GlyphTable
+from geometry import GeometryCache, axis_length, detail_level, layer_level, outline_length
+from lighting import LightingLUT, brightness_buckets, bucket_centres
+from particles import GLYPHS, ParticlePool
+from raster import disc_cells
+from profiling import StageProfiler
+from scheduler import FrameScheduler
+from screen import FrameDiffWriter
+from transform import rotate_points, rotation_matrix
 
 class Advanced3DCoin:
     def __init__(self):
@@ -11,12 +22,17 @@ class Advanced3DCoin:
         self.width = 120
         self.height = 40
         
+        # Samples per cell: 'cell', or 'half' and 'braille' for half
+        # blocks and braille dots (see framebuffer.SUBCELL_MODES)
+        self.subcell = 'cell'
+        
         # Coin parameters
         self.radius = 15
         self.thickness = 4
         self.rotation_speed_x = 0.07
         self.rotation_speed_y = 0.05
         self.rotation_speed_z = 0.03
+        self.pulse_speed = 0.1
         
         # Advanced rendering parameters
         self.K1 = 50  # Distance from viewer
@@ -28,22 +44,34 @@ class Advanced3DCoin:
         self.angle_z = 0
         self.frame_count = 0
         
-        # Particle system for sparkles
-        self.particles = []
+        # Particle system for sparkles; the pool follows max_particles and
+        # particle_rate is the mean number of sparkles started per frame
         self.max_particles = 30
+        self.particle_rate = 0.3
+        self.rng = np.random.default_rng(random.getrandbits(64))
+        self.particles = ParticlePool(self.max_particles, self.rng)
+        
+        # SGR parameters for terminal colors; cells store these as their
+        # attribute and the screen only emits them when they change
+        self.sgr_codes = {
+            'gold': (93,),
+            'silver': (37,),
+            'bright': (97,),
+            'yellow': (33,),
+            'cyan': (96,),
+            'magenta': (95,),
+            'reset': (),
+            'bold': (1,),
+            'dim': (2,)
+        }
         
         # Color codes for terminal
-        self.colors = {
-            'gold': '\033[93m',
-            'silver': '\033[37m',
-            'bright': '\033[97m',
-            'yellow': '\033[33m',
-            'cyan': '\033[96m',
-            'magenta': '\033[95m',
-            'reset': '\033[0m',
-            'bold': '\033[1m',
-            'dim': '\033[2m'
-        }
+        self.colors = {name: '\033[' + ';'.join(map(str, codes or (0,))) + 'm'
+                       for name, codes in self.sgr_codes.items()}
+        
+        # Each sparkle keeps one of these colors for its whole life
+        self.particle_colors = [self.sgr_codes['cyan'], self.sgr_codes['magenta'],
+                                self.sgr_codes['bright']]
         
         # ASCII gradient for shading
         self.shading_chars = ' .,-~:;=!*#$@'
@@ -52,9 +80,63 @@ class Advanced3DCoin:
         self.rainbow_mode = False
         self.pulse_effect = True
         
-    def clear_screen(self):
-        sys.stdout.write('\033[2J\033[H')
-        sys.stdout.flush()
+        # Coin meshes, kept for every level of detail a rotation goes
+        # through, so they are only rebuilt when their parameters change
+        self.geometry = GeometryCache(max_entries=32)
+        
+        # Skip primitive groups that can not be seen; only turned off to
+        # check what culling drops
+        self.culling = True
+        
+        # Rendered coin frames (without particles), replayed once the
+        # rotation and pulse come back around
+        self.frame_cache = FrameCache()
+        self.phase = 0
+        self.pulse_angle = 0.0
+        
+        # calculate_lighting precomputed over normal directions
+        self.lighting = LightingLUT(lambda normals: self.calculate_lighting(*normals.T))
+        
+        # Shading character and gold-mode color for every brightness bucket
+        self.shade_table = [
+            (self.shading_chars[int(brightness * (len(self.shading_chars) - 1))],
+             self.brightness_color(brightness))
+            for brightness in bucket_centres().tolist()]
+        
+        # Every attribute a cell can have; frame buffers hold indices into
+        # this palette, with the shading colors, the rainbow color at each
+        # whole degree around the coin and the sparkle colors looked up
+        self.palette = list(dict.fromkeys(
+            [self.sgr_codes['reset'], self.sgr_codes['gold']]
+            + [color for _, color in self.shade_table]
+            + [self.get_rainbow_color(degree) for degree in range(360)]
+            + self.particle_colors))
+        palette_index = {attr: i for i, attr in enumerate(self.palette)}
+        self.gold_attr = palette_index[self.sgr_codes['gold']]
+        self.shade_attrs = np.array([palette_index[color] for _, color in self.shade_table], dtype=np.uint8)
+        self.rainbow_attrs = np.array([palette_index[self.get_rainbow_color(degree)]
+                                       for degree in range(360)], dtype=np.uint8)
+        self.particle_attrs = np.array([palette_index[color] for color in self.particle_colors],
+                                       dtype=np.uint8)
+        
+        # Glyph, attribute and depth planes the coin is drawn into, and the
+        # whole screen with its border; both number glyphs in one table
+        self.glyphs = GlyphTable(' ' + self.shading_chars)
+        self.particle_glyphs = self.glyphs.lookup(GLYPHS)
+        
+        # Point types as stored in a mesh's kinds, the rasterized faces
+        # first, and the glyph choices of every type, side and bucket
+        self.point_types = ('front', 'back', 'edge', 'face')
+        self.choice_glyphs, self.choice_starts, self.choice_lengths = self.compile_glyph_table()
+        self.buffer = FrameBuffer(self.width, self.height, self.glyphs, mode=self.subcell)
+        self.screen_buffer = FrameBuffer(self.width, self.height + 2, self.glyphs)
+        
+        # Terminal output that only rewrites changed cells
+        self.screen = FrameDiffWriter()
+        self.scheduler = FrameScheduler(fps=30)
+        
+        # Per-stage timings, shown in the info line when the HUD is on
+        self.profiler = StageProfiler()
     
     def create_happy_face(self, x, y, z, scale=1.0):
         """Generate points for a happy face"""
@@ -96,30 +178,24 @@ class Advanced3DCoin:
         
         return points
     
-    def generate_coin_surface(self, face_type='happy'):
-        """Generate 3D points for the coin surface with face"""
+    def generate_coin_surface(self, face_type='happy', samples=120, layers=5):
+        """Generate 3D points for the coin's rim and face
+        
+        The front and back of the disc are not sampled; face_cells fills
+        them with the scanline rasterizer.
+        """
         points = []
         
-        # Create the main coin disc using parametric equations
-        for theta in range(0, 360, 5):
-            for r in range(0, self.radius, 2):
-                rad_theta = math.radians(theta)
-                x = r * math.cos(rad_theta)
-                y = r * math.sin(rad_theta)
-                
-                # Front face
-                points.append((x, y, self.thickness / 2, 'front'))
-                # Back face
-                points.append((x, y, -self.thickness / 2, 'back'))
-        
-        # Create the rim (edge) of the coin
-        for theta in range(0, 360, 3):
-            rad_theta = math.radians(theta)
+        # Create the rim (edge) of the coin, samples points around and
+        # layers across
+        layers = np.linspace(-self.thickness / 2, self.thickness / 2, layers).tolist()
+        for i in range(samples):
+            rad_theta = 2 * math.pi * i / samples
             x = self.radius * math.cos(rad_theta)
             y = self.radius * math.sin(rad_theta)
             
             # Create thickness
-            for z in range(-self.thickness // 2, self.thickness // 2 + 1):
+            for z in layers:
                 points.append((x, y, z, 'edge'))
         
         # Add face features
@@ -133,30 +209,121 @@ class Advanced3DCoin:
         
         return points
     
-    def rotate_point(self, x, y, z):
-        """Apply 3D rotation matrices"""
-        # Rotation around X axis
-        cos_x, sin_x = math.cos(self.angle_x), math.sin(self.angle_x)
-        y, z = y * cos_x - z * sin_x, y * sin_x + z * cos_x
-        
-        # Rotation around Y axis
-        cos_y, sin_y = math.cos(self.angle_y), math.sin(self.angle_y)
-        x, z = x * cos_y + z * sin_y, -x * sin_y + z * cos_y
-        
-        # Rotation around Z axis
-        cos_z, sin_z = math.cos(self.angle_z), math.sin(self.angle_z)
-        x, y = x * cos_z - y * sin_z, x * sin_z + y * cos_z
-        
-        return x, y, z
+    def compile_glyph_table(self):
+        """Glyph choices compiled into (point type, side, bucket) tables
+        
+        The side is whether a point lies beyond the coin's centre. Returns
+        the GlyphTable numbers of every distinct set of choices back to
+        back, and per entry where its set starts and how many it has, so
+        a cell's glyph is picked with one index and a random offset.
+        """
+        sides = {'face': ('☹○◌#', '☺◉●@'), 'edge': ('║│┃█', '║│┃█')}
+        choices = [[[char if char == ' ' or point_type not in sides else sides[point_type][side]
+                     for char, _ in self.shade_table]
+                    for side in (0, 1)]
+                   for point_type in self.point_types]
+        sets = list(dict.fromkeys(choice for rows in choices for row in rows for choice in row))
+        offsets = np.cumsum([0] + [len(choice) for choice in sets])
+        index = {choice: i for i, choice in enumerate(sets)}
+        ids = np.array([[[index[choice] for choice in row] for row in rows] for rows in choices])
+        return self.glyphs.lookup(''.join(sets)), offsets[ids], np.diff(offsets)[ids]
+    
+    def sample_grid(self):
+        """Width and height of the grid the coin is rendered on, and its samples per cell across and down"""
+        across, down = SUBCELL_MODES[self.subcell]
+        return self.width * across, self.height * down, across, down
+    
+    def camera(self):
+        """Perspective projection as (cx, cy, fx, fy, dz, d0), see raster.disc_cells"""
+        width, height, across, down = self.sample_grid()
+        return (width / 2, height / 2, self.K1 * across, -self.K1 / 2 * down, 1, self.K1)
+    
+    def face_cells(self, matrix, pulse, faces=('front', 'back')):
+        """Cells covered by the front and back of the disc, or just the given faces
+        
+        Yields (point type, cells, depth, xyz) per face, with the view-space
+        point on the face behind every covered cell.
+        """
+        camera = self.camera()
+        width, height, _, _ = self.sample_grid()
+        axis_u = matrix @ (self.radius * pulse, 0, 0)
+        axis_v = matrix @ (0, self.radius * pulse, 0)
+        for point_type, z in (('front', self.thickness / 2), ('back', -self.thickness / 2)):
+            if point_type not in faces:
+                continue
+            center = matrix @ (0, 0, z)
+            cells, depth, u, v = disc_cells(center, axis_u, axis_v, camera, width, height)
+            yield point_type, cells, depth, center + np.outer(u, axis_u) + np.outer(v, axis_v)
+    
+    def detail_samples(self, matrix, pulse=1.0):
+        """Rim samples around and layers across for the coin's projected size
+        
+        Around the outline there are about two per cell or sample, and
+        across the rim at most a cell between layers, so the rim covers
+        its cells on its own once culling has dropped what is behind it.
+        """
+        width, height, across, down = self.sample_grid()
+        radius = self.radius * pulse
+        scale = self.K1 / max(self.K1 - radius, 1)  # Scale of the nearest rim point
+        scale_x, scale_y = scale * across, scale / 2 * down
+        samples = detail_level(outline_length(matrix, radius, scale_x, scale_y), width, height,
+                               per_cell=2)
+        return samples, layer_level(axis_length(matrix, self.thickness, scale_x, scale_y))
+    
+    def build_point_cloud(self, face_type='happy', samples=120, layers=5):
+        """Pack the coin surface into an (N,3) array, its point types and primitive groups
+        
+        Points are ordered by group: rim segments, apart from the rim's
+        edges along each face, which are grouped on their own, then the
+        features on each side. The groups also bound the two rasterized
+        faces.
+        """
+        half = self.thickness / 2
+        points = self.generate_coin_surface(face_type, samples, layers)
+        # Every layer of a rim sample lies in the same segment
+        segments = {(x, y): rim_segment(x, y) for x, y, z, point_type in points if point_type == 'edge'}
+        labels = [('edge', z > 0, segments[x, y]) if point_type == 'edge' and abs(z) == half else
+                  ('rim', segments[x, y]) if point_type == 'edge' else
+                  'front features' if z > 0 else 'back features'
+                  for x, y, z, point_type in points]
+        order, runs = group_points(labels)
+        xyz = np.array([point[:3] for point in points], dtype=np.float64)[order]
+        point_types = np.array([self.point_types.index(point[3]) for point in points], dtype=np.int8)[order]
+        
+        # Rim points face straight out from the axis. The rim's edges
+        # outline the faces, so their normals also take in the face's and
+        # they are kept while either of the two faces the eye. Features
+        # stand off the face and may show past its edge, so they get no
+        # common direction and are only culled off the screen
+        rim_normals = xyz * (1, 1, 0)
+        groups = []
+        for label, start, stop in runs:
+            if label in ('front features', 'back features'):
+                normals = [(0, 0, 1), (0, 0, -1)]
+            elif label[0] == 'edge':
+                normals = np.vstack((rim_normals[start:stop], [(0, 0, 1 if label[1] else -1)]))
+            else:
+                normals = rim_normals[start:stop]
+            groups.append((label, start, stop, xyz[start:stop], normals))
+        for face, z in (('front', half), ('back', -half)):
+            groups.append((face, 0, 0, disc_outline(z, self.radius), [(0, 0, np.sign(z))]))
+        
+        for array in (xyz, point_types):
+            array.flags.writeable = False
+        return xyz, point_types, PrimitiveGroups(groups)
+    
+    def rotation_matrix(self):
+        """Composed rotation matrix for the current frame"""
+        return rotation_matrix(self.angle_x, self.angle_y, self.angle_z)
     
     def calculate_lighting(self, nx, ny, nz):
-        """Calculate Phong lighting model"""
+        """Calculate Phong lighting model, for single normals or arrays"""
         # Light direction (normalized)
         lx, ly, lz = 0.5, 0.5, -0.7
         
         # Diffuse lighting
         dot_product = nx * lx + ny * ly + nz * lz
-        diffuse = max(0, dot_product)
+        diffuse = np.maximum(0, dot_product)
         
         # Specular lighting
         reflection = 2 * dot_product
@@ -165,188 +332,246 @@ class Advanced3DCoin:
         rz = reflection * nz - lz
         
         # View vector (looking at origin)
-        view_dot = max(0, -rz)
+        view_dot = np.maximum(0, -rz)
         specular = view_dot ** 20  # Shininess factor
         
         # Ambient light
         ambient = 0.2
         
-        return min(1, ambient + diffuse * 0.7 + specular * 0.3)
+        return np.minimum(1, ambient + diffuse * 0.7 + specular * 0.3)
+    
+    def brightness_color(self, brightness):
+        """Color ladder for gold mode"""
+        if brightness > 0.8:
+            return self.sgr_codes['bright'] + self.sgr_codes['bold']
+        elif brightness > 0.6:
+            return self.sgr_codes['gold']
+        elif brightness > 0.3:
+            return self.sgr_codes['yellow']
+        else:
+            return self.sgr_codes['dim']
     
     def update_particles(self):
         """Update particle system for sparkle effects"""
-        # Add new particles
-        if len(self.particles) < self.max_particles and random.random() < 0.3:
-            angle = random.uniform(0, 2 * math.pi)
-            r = self.radius + random.uniform(2, 5)
-            self.particles.append({
-                'x': r * math.cos(angle),
-                'y': r * math.sin(angle),
-                'z': random.uniform(-5, 5),
-                'vx': random.uniform(-0.5, 0.5),
-                'vy': random.uniform(-0.5, 0.5),
-                'vz': random.uniform(-0.3, 0.3),
-                'life': 20,
-                'char': random.choice(['*', '·', '°', '˚', '✦', '✧', '⋆', '₊'])
-            })
+        particles = self.particles
+        if particles.capacity != self.max_particles:
+            particles.resize(self.max_particles)
+        
+        # Add new particles in one batch
+        particles.spawn(particles.rng.poisson(self.particle_rate), self.radius,
+                        len(self.particle_colors))
         
         # Update existing particles
-        for p in self.particles[:]:
-            p['x'] += p['vx']
-            p['y'] += p['vy']
-            p['z'] += p['vz']
-            p['life'] -= 1
-            
-            if p['life'] <= 0:
-                self.particles.remove(p)
+        particles.step()
     
     def get_rainbow_color(self, index):
         """Generate rainbow colors"""
         colors = [
-            '\033[91m',  # Red
-            '\033[93m',  # Yellow
-            '\033[92m',  # Green
-            '\033[96m',  # Cyan
-            '\033[94m',  # Blue
-            '\033[95m',  # Magenta
+            (91,),  # Red
+            (93,),  # Yellow
+            (92,),  # Green
+            (96,),  # Cyan
+            (94,),  # Blue
+            (95,),  # Magenta
         ]
         return colors[index % len(colors)]
     
     def render_frame(self):
-        """Render a single frame of the animation"""
-        # Initialize buffers
-        output = [[' ' for _ in range(self.width)] for _ in range(self.height)]
-        zbuffer = [[float('-inf') for _ in range(self.width)] for _ in range(self.height)]
+        """Render a single frame of the animation into the screen buffer"""
+        # The coin itself only depends on the rotation phase and mode
+        key = (self.width, self.height, self.subcell, self.radius, self.thickness, self.K1,
+               self.pulse_effect, self.rainbow_mode, self.phase)
+        glyphs, attrs = self.frame_cache.get(key, self.render_coin)
+        
+        # The coin goes inside the border, clipped to leave room for it
+        inner = self.width - 2
+        screen = self.screen_buffer
+        screen.resize(self.width, self.height + 2)
+        screen_glyphs, screen_attrs = screen.planes()
+        screen_glyphs[1:-1, 1:-1] = glyphs[:, :inner]
+        screen_attrs[1:-1, 1:-1] = attrs[:, :inner]
         
-        # Generate coin points
-        points = self.generate_coin_surface()
+        # Render particles
+        with self.profiler.stage('particles'):
+            particles = self.particles
+            ys, xs, slots = particles.project(self.rotation_matrix(), self.width,
+                                              self.height, self.K1)
+            shown = xs < inner
+            ys, xs, slots = ys[shown] + 1, xs[shown] + 1, slots[shown]
+            screen_glyphs[ys, xs] = self.particle_glyphs[particles.glyph[slots]]
+            screen_attrs[ys, xs] = self.particle_attrs[particles.color[slots]]
+        
+        return screen_glyphs, screen_attrs
+    
+    def render_coin(self):
+        """Render the coin, without particles, at the current phase
+
+        Returns copies of the glyph and attribute planes, which is all
+        the frame cache keeps.
+        """
+        # Blank the reused buffers, which render on the sample grid of the
+        # sub-cell mode
+        buffer = self.buffer
+        buffer.resize(self.width, self.height, self.subcell)
+        buffer.reset()
+        width, height, across, down = self.sample_grid()
         
         # Pulse effect
         pulse = 1.0
         if self.pulse_effect:
-            pulse = 1.0 + 0.1 * math.sin(self.frame_count * 0.1)
-        
-        # Render coin points
-        for point in points:
-            x, y, z = point[0] * pulse, point[1] * pulse, point[2]
-            point_type = point[3] if len(point) > 3 else 'front'
+            pulse = 1.0 + 0.1 * math.sin(self.pulse_angle)
+        matrix = self.rotation_matrix()
+        
+        # Generate coin points, at the level of detail the projected size needs
+        with self.profiler.stage('geometry'):
+            face_type = 'happy'
+            samples, layers = self.detail_samples(matrix, pulse)
+            xyz, point_types, groups = self.geometry.get(
+                (self.radius, self.thickness, face_type, samples, layers),
+                self.build_point_cloud, face_type, samples, layers)
+        
+        # Drop the groups that face away or fall off the screen
+        with self.profiler.stage('cull'):
+            scale = (pulse, pulse, 1.0)
+            if self.culling:
+                visible = groups.visible(matrix, self.camera(), width, height, scale)
+            else:
+                visible = np.ones(len(groups.starts), dtype=bool)
+            faces = [face for face in ('front', 'back') if visible[groups.index[face]]]
+            shown = groups.select(visible)
+        
+        # Scale and rotate the rest of the mesh with one composed matrix
+        with self.profiler.stage('transform'):
+            rotated = rotate_points(xyz[shown] * scale, matrix)
+        
+        # Project the rim and features, then fill the faces a scanline at
+        # a time; the faces go first into the depth test, which keeps only
+        # the nearest surface per cell
+        with self.profiler.stage('rasterize'):
+            x, y, z = rotated.T
+            dist = z + self.K1
+            ahead = np.flatnonzero(dist > 0)
+            ooz = 1 / dist[ahead]
+            xp = (width / 2 + x[ahead] * ooz * self.K1 * across).astype(np.intp)
+            yp = (height / 2 - y[ahead] * ooz * self.K1 / 2 * down).astype(np.intp)  # Aspect ratio correction
+            inside = (xp >= 0) & (xp < width) & (yp >= 0) & (yp < height)
+            points = ahead[inside]
             
-            # Apply rotation
-            x, y, z = self.rotate_point(x, y, z)
+            parts = [(cells, depth, face_xyz, np.full(len(cells), self.point_types.index(point_type),
+                                                      dtype=np.int8))
+                     for point_type, cells, depth, face_xyz in self.face_cells(matrix, pulse, faces)]
+            parts.append(((yp * width + xp)[inside], ooz[inside], rotated[points],
+                          point_types[shown][points]))
+            cell, depth, xyz, kinds = (np.concatenate(arrays) for arrays in zip(*parts))
+            cells, winners = buffer.depth_test(cell, depth)
+            xyz, kinds = xyz[winners], kinds[winners]
+        
+        # Shade only the points that survived the depth test
+        with self.profiler.stage('shade'):
+            # Look up the lighting for every surviving normal at once
+            normals = xyz / (self.radius, self.radius, self.thickness)
+            brightness = self.lighting.lookup(normals)
+            buckets = brightness_buckets(brightness)
             
-            # Perspective projection
-            if z + self.K1 <= 0:
-                continue
+            # Rainbow colors follow the angle around the coin instead
+            if self.rainbow_mode:
+                degrees = np.degrees(np.arctan2(xyz[:, 1], xyz[:, 0])).astype(np.intp)
+                attrs = self.rainbow_attrs[degrees % 360]
+            else:
+                attrs = self.shade_attrs[buckets]
             
-            ooz = 1 / (z + self.K1)
-            xp = int(self.width / 2 + x * ooz * self.K1)
-            yp = int(self.height / 2 - y * ooz * self.K1 / 2)  # Aspect ratio correction
-            
-            if 0 <= xp < self.width and 0 <= yp < self.height:
-                if ooz > zbuffer[yp][xp]:
-                    zbuffer[yp][xp] = ooz
-                    
-                    # Calculate lighting
-                    nx, ny, nz = x / self.radius, y / self.radius, z / self.thickness
-                    norm = math.sqrt(nx**2 + ny**2 + nz**2)
-                    if norm > 0:
-                        nx, ny, nz = nx/norm, ny/norm, nz/norm
-                    
-                    brightness = self.calculate_lighting(nx, ny, nz)
-                    char_index = int(brightness * (len(self.shading_chars) - 1))
-                    char = self.shading_chars[char_index]
-                    
-                    # Special characters for faces
-                    if point_type == 'face':
-                        if z > 0:  # Front face (happy)
-                            char = random.choice(['☺', '◉', '●', '@']) if char != ' ' else char
-                        else:  # Back face (sad)
-                            char = random.choice(['☹', '○', '◌', '#']) if char != ' ' else char
-                    elif point_type == 'edge':
-                        char = random.choice(['║', '│', '┃', '█']) if char != ' ' else char
-                    
-                    # Apply color
-                    if self.rainbow_mode:
-                        color = self.get_rainbow_color(int(math.degrees(math.atan2(y, x))))
-                    else:
-                        if brightness > 0.8:
-                            color = self.colors['bright'] + self.colors['bold']
-                        elif brightness > 0.6:
-                            color = self.colors['gold']
-                        elif brightness > 0.3:
-                            color = self.colors['yellow']
-                        else:
-                            color = self.colors['dim']
-                    
-                    output[yp][xp] = color + char + self.colors['reset']
-        
-        # Render particles
-        for particle in self.particles:
-            x, y, z = self.rotate_point(particle['x'], particle['y'], particle['z'])
-            
-            if z + self.K1 <= 0:
-                continue
+            if buffer.mode != 'cell':
+                # Dots can not draw the faces' glyphs, so the features are
+                # cut out of the disc instead
+                buffer.levels[cells] = np.where(kinds == self.point_types.index('face'), 0, brightness)
+                buffer.sample_attrs[cells] = attrs
+                buffer.pack(cells)
+            else:
+                # Special characters for the faces and rim, picked at
+                # random from their choices
+                side = (xyz[:, 2] > 0).astype(np.intp)
+                pick = self.choice_starts[kinds, side, buckets] + self.rng.integers(
+                    0, self.choice_lengths[kinds, side, buckets])
+                buffer.glyphs[cells] = self.choice_glyphs[pick]
+                buffer.attrs[cells] = attrs
+        
+        return buffer.frame()
+    
+    def add_frame_decorations(self):
+        """Add decorative elements around the frame and write it out"""
+        gold = self.gold_attr
+        screen = self.screen_buffer
+        
+        with self.profiler.stage('encode'):
+            # Top border
+            border = "═" * self.width
+            screen.put(0, 0, "╔" + border[:self.width-2] + "╗", gold)
             
-            ooz = 1 / (z + self.K1)
-            xp = int(self.width / 2 + x * ooz * self.K1)
-            yp = int(self.height / 2 - y * ooz * self.K1 / 2)
+            # Side borders
+            glyphs, attrs = screen.planes()
+            glyphs[1:-1, [0, -1]] = self.glyphs.glyph("║")
+            attrs[1:-1, [0, -1]] = gold
             
-            if 0 <= xp < self.width and 0 <= yp < self.height:
-                color = random.choice([
-                    self.colors['cyan'],
-                    self.colors['magenta'],
-                    self.colors['bright']
-                ])
-                output[yp][xp] = color + particle['char'] + self.colors['reset']
-        
-        return output
+            # Bottom border with info, plus stage timings when the HUD is on
+            info = f" Frame: {self.frame_count} | Particles: {len(self.particles)} | Mode: {'Rainbow' if self.rainbow_mode else 'Gold'} "
+            if self.profiler.show_hud:
+                info += f"| {self.profiler.hud()} "
+            border_with_info = "═" * ((self.width - len(info)) // 2) + info + "═" * ((self.width - len(info)) // 2)
+            screen.put(self.height + 1, 0, "╚" + border_with_info[:self.width-2] + "╝", gold)
+        
+        with self.profiler.stage('write'):
+            self.screen.write_planes(glyphs, attrs, self.glyphs, self.palette)
     
-    def add_frame_decorations(self, output):
-        """Add decorative elements around the frame"""
-        # Top border
-        border = "═" * self.width
-        print(self.colors['gold'] + "╔" + border[:self.width-2] + "╗" + self.colors['reset'])
-        
-        # Main content with side borders
-        for row in output:
-            print(self.colors['gold'] + "║" + self.colors['reset'] + 
-                  ''.join(row[:self.width-2]) + 
-                  self.colors['gold'] + "║" + self.colors['reset'])
-        
-        # Bottom border with info
-        info = f" Frame: {self.frame_count} | Particles: {len(self.particles)} | Mode: {'Rainbow' if self.rainbow_mode else 'Gold'} "
-        border_with_info = "═" * ((self.width - len(info)) // 2) + info + "═" * ((self.width - len(info)) // 2)
-        print(self.colors['gold'] + "╚" + border_with_info[:self.width-2] + "╝" + self.colors['reset'])
-    
-    def run(self):
-        """Main animation loop"""
+    def run(self, frames=None):
+        """Main animation loop, optionally stopping after a number of frames"""
+        start_frame = self.frame_count
+        elapsed = 1
+        
+        # Snap the speeds so the rotation and pulse realign after period frames
+        period, speeds = rotation_period((self.rotation_speed_x, self.rotation_speed_y,
+                                          self.rotation_speed_z, self.pulse_speed))
+        *rotation_speeds, pulse_speed = speeds
+        
+        # SIGUSR1 captures the next frames with cProfile
+        self.profiler.install_signal()
         try:
-            while True:
-                self.clear_screen()
-                
-                # Update animation state
-                self.angle_x += self.rotation_speed_x
-                self.angle_y += self.rotation_speed_y
-                self.angle_z += self.rotation_speed_z
-                self.frame_count += 1
+            while frames is None or self.frame_count - start_frame < frames:
+                # Update animation state, including any skipped frames
+                previous_count = self.frame_count
+                self.frame_count += elapsed
+                self.phase = self.frame_count % period
+                self.angle_x, self.angle_y, self.angle_z = (self.phase * speed % (2 * math.pi)
+                                                            for speed in rotation_speeds)
+                self.pulse_angle = self.phase * pulse_speed % (2 * math.pi)
                 
                 # Toggle rainbow mode periodically
-                if self.frame_count % 200 == 0:
+                if self.frame_count // 200 != previous_count // 200:
                     self.rainbow_mode = not self.rainbow_mode
                 
                 # Update particles
-                self.update_particles()
+                with self.profiler.stage('particles'):
+                    for _ in range(elapsed):
+                        self.update_particles()
                 
                 # Render and display frame
-                frame = self.render_frame()
-                self.add_frame_decorations(frame)
+                self.render_frame()
+                self.add_frame_decorations()
+                self.profiler.end_frame()
                 
-                # Control frame rate
-                time.sleep(0.03)
+                # Wait for the next frame deadline
+                elapsed = self.scheduler.wait()
                 
         except KeyboardInterrupt:
+            self.screen.close()
             print("\n" + self.colors['gold'] + "✨ Animation ended! Thanks for watching! ✨" + self.colors['reset'])
+            return
+        self.screen.close()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Spinning coin with lighting, sparkles and effects")
+    parser.add_argument('--subcell', choices=SUBCELL_MODES, default='cell',
+                        help="draw with half blocks or braille dots for more resolution")
+    args = parser.parse_args()
     coin = Advanced3DCoin()
+    coin.subcell = args.subcell
     coin.run()
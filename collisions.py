@@ -0,0 +1,120 @@
+import numpy as np
+
+# Half of the surrounding buckets; together with pairs inside a bucket
+# this visits every pair of neighbouring balls exactly once
+NEIGHBOURS = ((1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+def expand_pairs(firsts, starts, counts):
+    """Pair every firsts[k] with starts[k], ..., starts[k] + counts[k] - 1"""
+    total = counts.sum()
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(firsts, counts), np.repeat(starts, counts) + offsets
+
+
+def candidate_pairs(x, y, width, height, cell=1.0):
+    """Find ball pairs that share or neighbour a spatial hash bucket
+
+    The hash is a uniform grid of cell x cell buckets over the screen,
+    rebuilt from scratch on every call by sorting balls on their bucket.
+    Returns two index arrays into x and y.
+    """
+    cols = max(1, int(np.ceil(width / cell)))
+    rows = max(1, int(np.ceil(height / cell)))
+    cx = np.clip((x / cell).astype(np.intp), 0, cols - 1)
+    cy = np.clip((y / cell).astype(np.intp), 0, rows - 1)
+
+    # Sort balls by bucket so each bucket is a contiguous run
+    key = cy * cols + cx
+    order = np.argsort(key, kind='stable')
+    key = key[order]
+    cx, cy = cx[order], cy[order]
+    counts = np.bincount(key, minlength=cols * rows)
+    starts = np.cumsum(counts) - counts
+    position = np.arange(len(order))
+
+    # Pairs inside a bucket, each ball with the ones sorted after it
+    after = starts[key] + counts[key] - position - 1
+    i, j = expand_pairs(position, position + 1, after)
+    firsts, seconds = [i], [j]
+
+    # Pairs with the neighbouring buckets
+    for dx, dy in NEIGHBOURS:
+        nx, ny = cx + dx, cy + dy
+        valid = (nx >= 0) & (nx < cols) & (ny < rows)
+        neighbour = ny[valid] * cols + nx[valid]
+        i, j = expand_pairs(position[valid], starts[neighbour], counts[neighbour])
+        firsts.append(i)
+        seconds.append(j)
+
+    return order[np.concatenate(firsts)], order[np.concatenate(seconds)]
+
+
+def resolve_collisions(x, y, vx, vy, width, height, radius=0.5, rounds=4):
+    """Elastic collisions between equal-mass balls, updated in place
+
+    Touching pairs that are moving towards each other swap the velocity
+    components along the line between their centres, and overlapping
+    balls are pushed apart. A ball touching several others is resolved
+    against one of them per round, which keeps energy conserved in
+    crowds. Returns the number of collisions.
+    """
+    i, j = candidate_pairs(x, y, width, height, cell=max(1.0, 2 * radius))
+    dx = x[j] - x[i]
+    dy = y[j] - y[i]
+    dist2 = dx * dx + dy * dy
+    touching = (dist2 < (2 * radius) ** 2) & (dist2 > 0)
+    i, j, dx, dy = i[touching], j[touching], dx[touching], dy[touching]
+    dist = np.sqrt(dist2[touching])
+    nx, ny = dx / dist, dy / dist
+    n = len(x)
+
+    # Push overlapping balls apart
+    push = (2 * radius - dist) / 2
+    for pos, normal in ((x, nx), (y, ny)):
+        pos -= np.bincount(i, push * normal, n)
+        pos += np.bincount(j, push * normal, n)
+
+    hits = 0
+    for _ in range(rounds):
+        # Only pairs closing in on each other collide
+        closing = (vx[i] - vx[j]) * nx + (vy[i] - vy[j]) * ny
+        live = closing > 0
+        i, j, nx, ny, closing = i[live], j[live], nx[live], ny[live], closing[live]
+        if not len(i):
+            break
+
+        # Take each ball's first pair this round, so every ball sees at
+        # most one collision per round
+        pair = np.arange(len(i))
+        first = np.full(n, len(i))
+        np.minimum.at(first, i, pair)
+        np.minimum.at(first, j, pair)
+        take = (first[i] == pair) & (first[j] == pair)
+
+        for vel, normal in ((vx, nx), (vy, ny)):
+            impulse = closing[take] * normal[take]
+            vel[i[take]] -= impulse
+            vel[j[take]] += impulse
+        hits += int(take.sum())
+
+        rest = ~take
+        i, j, nx, ny = i[rest], j[rest], nx[rest], ny[rest]
+
+    return hits
+
+
+def collide_balls(balls, width, height, radius=0.5):
+    """resolve_collisions for a list of Ball objects
+
+    Every ball's position and velocity is copied back, since overlapping
+    balls are pushed apart even when none of them collide.
+    """
+    x = np.array([ball.x for ball in balls], dtype=np.float64)
+    y = np.array([ball.y for ball in balls], dtype=np.float64)
+    vx = np.array([ball.vx for ball in balls], dtype=np.float64)
+    vy = np.array([ball.vy for ball in balls], dtype=np.float64)
+    hits = resolve_collisions(x, y, vx, vy, width, height, radius)
+    for ball, state in zip(balls, zip(x.tolist(), y.tolist(), vx.tolist(), vy.tolist())):
+        ball.x, ball.y, ball.vx, ball.vy = state
+    return hits
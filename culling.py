@@ -0,0 +1,113 @@
+import math
+
+import numpy as np
+
+# Segments the rim of a coin is split into for culling
+RIM_SEGMENTS = 8
+
+
+def rim_segment(x, y, segments=RIM_SEGMENTS):
+    """Which of the rim's segments the angle of (x, y) falls in"""
+    angle = math.atan2(y, x) % (2 * math.pi)
+    return min(segments - 1, int(angle / (2 * math.pi) * segments))
+
+
+def group_points(labels):
+    """Order that brings points with equal labels together, keeping their order
+
+    Returns the order and the (label, start, stop) of every group in it,
+    with groups in order of first appearance.
+    """
+    names = list(dict.fromkeys(labels))
+    rank = {name: i for i, name in enumerate(names)}
+    ranks = np.array([rank[label] for label in labels], dtype=np.intp)
+    stops = np.cumsum(np.bincount(ranks, minlength=len(names)))
+    starts = stops - np.bincount(ranks, minlength=len(names))
+    return np.argsort(ranks, kind='stable'), list(zip(names, starts.tolist(), stops.tolist()))
+
+
+def disc_outline(z, radius, samples=16):
+    """Points around a coin face's edge, for bounding it"""
+    angle = np.linspace(0, 2 * np.pi, samples, endpoint=False)
+    return np.column_stack((radius * np.cos(angle), radius * np.sin(angle), np.full(samples, z)))
+
+
+class PrimitiveGroups:
+    """Bounds of a mesh's primitive groups, for culling whole groups at once
+
+    Each group is a named run of mesh points (start to stop, which may be
+    empty for surfaces drawn another way, like rasterized discs) with a
+    bounding sphere and a cone holding the normals of all its points.
+    visible() tests every group against the eye and the screen bounds,
+    so hidden groups are never transformed, projected or shaded.
+    """
+    def __init__(self, groups):
+        """groups is a list of (name, start, stop, points, normals)"""
+        self.index = {}
+        rows = []
+        for i, (name, start, stop, points, normals) in enumerate(groups):
+            self.index[name] = i
+            points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+            normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+            normals = normals / np.linalg.norm(normals, axis=1)[:, None]
+            center = (points.min(axis=0) + points.max(axis=0)) / 2
+            radius = np.linalg.norm(points - center, axis=1).max()
+            axis = normals.mean(axis=0)
+            length = np.linalg.norm(axis)
+            if length < 1e-9:
+                axis, spread = np.zeros(3), math.pi  # No common direction: never back-facing
+            else:
+                axis = axis / length
+                spread = float(np.arccos(np.clip(normals @ axis, -1, 1)).max())
+            extent = -((points - center) @ axis).min()  # Reach behind the centre
+            rows.append((start, stop, *center, radius, *axis, spread, extent))
+        table = np.array(rows, dtype=np.float64).reshape(-1, 11)
+        self.starts = table[:, 0].astype(np.intp)
+        self.stops = table[:, 1].astype(np.intp)
+        self.centers = table[:, 2:5]
+        self.radii = table[:, 5]
+        self.axes = table[:, 6:9]
+        self.spreads = table[:, 9]
+        self.extents = table[:, 10]
+
+    def visible(self, matrix, camera, width, height, scale=(1, 1, 1)):
+        """Which groups may be seen once the mesh is scaled and rotated
+
+        camera is the (cx, cy, fx, fy, dz, d0) projection of
+        raster.disc_cells; the eye sits where dz * z + d0 is zero. A group
+        is dropped when every normal in its cone faces away from the eye,
+        or when its bounding sphere projects entirely off the screen.
+        """
+        cx, cy, fx, fy, dz, d0 = camera
+        grow = max(scale)
+        centers = (self.centers * scale) @ matrix.T
+        axes = self.axes @ matrix.T
+        radii = self.radii * grow
+
+        # Back-facing: n . (eye - p) < 0 for every point and normal in the group
+        to_eye = np.array([0, 0, -d0 / dz]) - centers
+        distance = np.linalg.norm(to_eye, axis=1)
+        facing = ((axes * to_eye).sum(axis=1) + self.extents * grow
+                  + 2 * np.sin(self.spreads / 2) * (distance + radii) >= 0)
+
+        # Bounding sphere against the screen, unless it reaches the eye
+        w = dz * centers[:, 2] + d0
+        near = w - abs(dz) * radii
+        with np.errstate(divide='ignore', invalid='ignore'):
+            screen_x = cx + fx * centers[:, 0] / w
+            screen_y = cy + fy * centers[:, 1] / w
+            reach_x = abs(fx) * radii * (1 + np.abs(dz * centers[:, 0]) / w) / near
+            reach_y = abs(fy) * radii * (1 + np.abs(dz * centers[:, 1]) / w) / near
+            on_screen = np.where(
+                near > 0,
+                (screen_x + reach_x >= 0) & (screen_x - reach_x < width)
+                & (screen_y + reach_y >= 0) & (screen_y - reach_y < height),
+                w + abs(dz) * radii > 0)
+        return facing & on_screen
+
+    def select(self, visible):
+        """Indices of the mesh points in the visible groups"""
+        starts, stops = self.starts[visible], self.stops[visible]
+        lengths = stops - starts
+        offsets = np.cumsum(lengths) - lengths
+        return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
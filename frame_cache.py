@@ -0,0 +1,90 @@
+import math
+import sys
+from collections import OrderedDict
+
+
+def frame_size(frame):
+    """Approximate bytes held by a rendered frame
+
+    Sequences of lists are walked down to the rows, and the distinct
+    objects in the rows are counted once, so glyphs and attributes shared
+    between cells are not counted once per cell. A frame kept as a tuple
+    of NumPy planes counts the planes with their data.
+    """
+    total = 0
+    cells = {}
+    stack = [frame]
+    while stack:
+        item = stack.pop()
+        total += sys.getsizeof(item)
+        if item and isinstance(item[0], list):
+            stack.extend(item)
+        elif not isinstance(item, str):
+            cells.update(zip(map(id, item), item))
+    return total + sum(map(sys.getsizeof, cells.values()))
+
+
+def rotation_period(speeds, tolerance=0.01, max_period=3600):
+    """Whole number of frames after which every rotation comes back around
+
+    Each speed (radians per frame) is snapped so that it completes a whole
+    number of turns in the period. The smallest period that changes no
+    speed by more than tolerance is used, or failing that the one that
+    changes them least. Returns (period, snapped speeds).
+    """
+    best = None
+    for period in range(1, max_period + 1):
+        turns = [round(speed * period / (2 * math.pi)) for speed in speeds]
+        snapped = [2 * math.pi * turn / period for turn in turns]
+        error = max((abs(new - speed) / abs(speed) for speed, new in zip(speeds, snapped) if speed),
+                    default=0.0)
+        if error <= tolerance:
+            return period, snapped
+        if best is None or error < best[0]:
+            best = (error, period, snapped)
+    return best[1], best[2]
+
+
+class FrameCache:
+    """LRU cache of rendered frames keyed on the rotation state
+
+    The spinning coins repeat exactly once their rotation comes back
+    around (see rotation_period), so a frame is keyed on the phase within
+    that period plus whatever else it was rendered from. The first cycle
+    is rendered and every later one is replayed from memory. Frames are
+    evicted least recently used first once they hold more than max_bytes,
+    which should cover a whole period to get any replays; a max_bytes of
+    0 turns caching off.
+    """
+    def __init__(self, max_bytes=128 * 2**20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, render, *args):
+        """Return the frame for key, calling render(*args) on a miss"""
+        if not self.max_bytes:
+            return render(*args)
+
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key][0]
+
+        frame = render(*args)
+        size = frame_size(frame)
+        self.entries[key] = (frame, size)
+        self.bytes += size
+        self.misses += 1
+
+        while self.bytes > self.max_bytes and self.entries:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.bytes -= size
+        return frame
+
+    def invalidate(self):
+        """Drop every cached frame"""
+        self.entries.clear()
+        self.bytes = 0
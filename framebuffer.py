@@ -0,0 +1,239 @@
+import shutil
+import signal
+
+import numpy as np
+
+# Samples across and down every terminal cell in each sub-cell mode
+SUBCELL_MODES = {'cell': (1, 1), 'half': (1, 2), 'braille': (2, 4)}
+
+# Glyph for every pattern of lit samples, and the sample (down, across)
+# each bit of the pattern stands for. Braille follows the Unicode dot
+# numbering; an empty pattern is a plain space in every mode.
+SUBCELL_GLYPHS = {
+    'half': ' ▀▄█',
+    'braille': ' ' + ''.join(map(chr, range(0x2801, 0x2900))),
+}
+SUBCELL_BITS = {
+    'half': ((0, 0), (1, 0)),
+    'braille': ((0, 0), (1, 0), (2, 0), (0, 1), (1, 1), (2, 1), (3, 0), (3, 1)),
+}
+
+# 4x4 ordered dithering thresholds, so sample levels shade with dots
+BAYER = (np.array([[0, 8, 2, 10], [12, 4, 14, 6], [3, 11, 1, 9], [15, 7, 13, 5]]) + 0.5) / 16
+
+
+class GlyphTable:
+    """The glyphs frame buffers hold, numbered in order of first use
+
+    Glyph planes store these uint16 numbers rather than characters, and
+    codes maps them back to code points once a frame is turned into text.
+    """
+    def __init__(self, chars=' '):
+        self.index = {}
+        self.codes = np.zeros(0, dtype=np.uint32)
+        self.lookup(chars)
+
+    def __len__(self):
+        return len(self.index)
+
+    def lookup(self, chars):
+        """Numbers of the glyphs in chars, numbering any new ones"""
+        new = [char for char in dict.fromkeys(chars) if char not in self.index]
+        if new:
+            if len(self.index) + len(new) > 2**16:
+                raise OverflowError("more glyphs than a uint16 plane can number")
+            self.index.update(zip(new, range(len(self.index), len(self.index) + len(new))))
+            self.codes = np.append(self.codes, [ord(char) for char in new]).astype(np.uint32)
+        return np.array([self.index[char] for char in chars], dtype=np.uint16)
+
+    def glyph(self, char):
+        """Number of a single glyph"""
+        return int(self.lookup(char)[0])
+
+    def rows(self, glyphs):
+        """Text of a (height, width) glyph plane, one string per row"""
+        height, width = glyphs.shape
+        return self.codes[glyphs].view(f'<U{width}')[:, 0].tolist()
+
+
+class FrameBuffer:
+    """Glyph, attribute and depth planes allocated once and reused every frame
+
+    The planes are flat, row-major NumPy arrays, so cell y * width + x
+    has the same index in all three: the glyph's number in a GlyphTable
+    (uint16), an attribute index into a palette the renderer keeps
+    (uint8) and the depth as 1 / w, -inf where nothing has been drawn.
+    Text is only produced from them when a frame is written out.
+
+    In a sub-cell mode (see SUBCELL_MODES) a cell is split into
+    across x down samples. The depth plane then holds a sample_width x
+    sample_height grid, with a brightness level and an attribute index
+    per sample, and pack() turns every cell's samples into one half
+    block or braille glyph.
+
+    reset() blanks the planes in place with one bulk fill each, and
+    resize() only reallocates them when the size really changes, so a
+    running animation allocates no buffers at all.
+    """
+    def __init__(self, width, height, table=None, blank=' ', attr=0, mode='cell'):
+        self.table = GlyphTable(blank) if table is None else table
+        self.blank = self.table.glyph(blank)
+        self.attr = attr
+        self.width = self.height = self.mode = None
+        self.resize(width, height, mode)
+
+    def resize(self, width, height, mode=None):
+        """Reallocate the planes for a new size or mode, returning whether it changed"""
+        mode = mode or self.mode
+        if (width, height, mode) == (self.width, self.height, self.mode):
+            return False
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.across, self.down = SUBCELL_MODES[mode]
+        self.sample_width = width * self.across
+        self.sample_height = height * self.down
+        samples = self.sample_width * self.sample_height
+        self.glyphs = np.empty(width * height, dtype=np.uint16)
+        self.attrs = np.empty(width * height, dtype=np.uint8)
+        self.depth = np.empty(samples, dtype=np.float64)
+        self.levels = np.empty(samples, dtype=np.float32)
+        self.sample_attrs = np.empty(samples, dtype=np.uint8)
+
+        # Dithering thresholds over the sample grid, and for pack() the
+        # weight of every sample down a column of a cell, the glyph number
+        # of every code the weighted columns make, and the cell and rank in
+        # bit order (highest first) of every sample
+        if mode != 'cell':
+            rows = np.arange(self.sample_height)[:, None]
+            cols = np.arange(self.sample_width)
+            self.thresholds = BAYER[rows % len(BAYER), cols % len(BAYER)].astype(np.float32).reshape(
+                height, self.down, width, self.across)
+            self.weights = (1 << np.arange(self.down, dtype=np.uint8))[:, None, None]
+            bits = SUBCELL_BITS[mode]
+            codes = np.arange(1 << (8 * (self.across - 1) + self.down))
+            self.patterns = self.table.lookup(SUBCELL_GLYPHS[mode])[
+                sum(((codes >> (8 * across + down)) & 1) << bit
+                    for bit, (down, across) in enumerate(bits))]
+            ranks = np.zeros((self.down, self.across), dtype=np.uint8)
+            for bit, position in enumerate(bits):
+                ranks[position] = len(bits) - 1 - bit
+            self.sample_cells = (rows // self.down * width + cols // self.across).astype(np.int32).ravel()
+            self.sample_ranks = ranks[rows % self.down, cols % self.across].ravel()
+            self.peaks = np.empty(width * height, dtype=np.uint64)
+        self.reset()
+        return True
+
+    def reset(self):
+        """Blank every cell and sample and push them to infinite depth"""
+        self.glyphs.fill(self.blank)
+        self.attrs.fill(self.attr)
+        self.depth.fill(-np.inf)
+        self.levels.fill(0)
+        self.sample_attrs.fill(self.attr)
+
+    def depth_test(self, cell, depth):
+        """Draw candidates into the depth plane, keeping the nearest per cell
+
+        cell holds the flat cell index and depth the 1 / w of every
+        candidate. Returns the cells that were won and the index of the
+        winner of each; the first candidate wins ties.
+        """
+        # ufunc.at takes a much slower path when it has to cast
+        depth = np.asarray(depth, dtype=self.depth.dtype)
+        np.maximum.at(self.depth, cell, depth)
+        front = np.flatnonzero(depth == self.depth[cell])
+        cells, first = np.unique(cell[front], return_index=True)
+        return cells, front[first]
+
+    def pack(self, samples, attrs=True):
+        """Turn the drawn samples into sub-cell glyphs and attributes
+
+        samples holds the flat index of every sample drawn since the last
+        reset, in order, as depth_test returns them. A sample is lit when
+        its level beats the dithering threshold there, and the lit
+        samples of every cell pick its glyph; only the rows of cells from
+        the first drawn sample to the last are packed, the rest stay
+        blank. Unless attrs is false, each cell with drawn samples also
+        takes the attribute of its brightest one, the first in bit order
+        winning ties.
+        """
+        if not len(samples):
+            return
+        band = self.sample_width * self.down
+        rows = slice(samples[0] // band, samples[-1] // band + 1)
+
+        # Weighting the lit samples down every column of a cell gives one
+        # byte per column, and a cell's bytes read together as a code
+        lit = self.levels.reshape(self.thresholds.shape)[rows] > self.thresholds[rows]
+        codes = (lit * self.weights).sum(axis=1, dtype=np.uint8).view(f'<u{self.across}')
+        np.take(self.patterns, codes[..., 0], out=self.glyphs.reshape(self.height, self.width)[rows])
+        if not attrs:
+            return
+
+        # Non-negative float32 levels order like their bits, so with the
+        # sample's rank below them they make one key per sample, and the
+        # largest key in a cell is its brightest sample, the first on ties
+        cell = self.sample_cells[samples]
+        key = np.left_shift(self.levels[samples].view(np.uint32), 3, dtype=np.uint64)
+        key |= self.sample_ranks[samples]
+        self.peaks.fill(0)
+        np.maximum.at(self.peaks, cell, key)
+        brightest = np.flatnonzero(key == self.peaks[cell])
+        self.attrs[cell[brightest]] = self.sample_attrs[samples[brightest]]
+
+    def planes(self):
+        """(height, width) views of the glyph and attribute planes"""
+        shape = (self.height, self.width)
+        return self.glyphs.reshape(shape), self.attrs.reshape(shape)
+
+    def frame(self):
+        """Copies of the glyph and attribute planes, to keep after a reset"""
+        glyphs, attrs = self.planes()
+        return glyphs.copy(), attrs.copy()
+
+    def put(self, y, x, text, attr=None):
+        """Write a string into row y from column x, clipped to the buffer"""
+        text = text[:max(0, self.width - x)]
+        cells = slice(y * self.width + x, y * self.width + x + len(text))
+        self.glyphs[cells] = self.table.lookup(text)
+        if attr is not None:
+            self.attrs[cells] = attr
+
+    def rows(self):
+        """The glyph plane as one string per row"""
+        return self.table.rows(self.planes()[0])
+
+
+class TerminalSize:
+    """The terminal's size, only read again after it has been resized
+
+    Once install_signal() has been called, SIGWINCH marks the size as
+    stale and the next poll() reads it, so the frame loop can resize its
+    buffers between frames instead of checking the terminal every frame.
+    """
+    def __init__(self, minimum=(1, 1), fallback=(80, 24)):
+        self.minimum = minimum
+        self.fallback = fallback
+        self.size = None
+        self.stale = True
+
+    def install_signal(self, signum=getattr(signal, 'SIGWINCH', None)):
+        """Read the size again whenever the process receives signum"""
+        if signum is not None:
+            signal.signal(signum, lambda *args: self.invalidate())
+
+    def invalidate(self):
+        """Read the size again on the next poll"""
+        self.stale = True
+
+    def poll(self):
+        """Return (width, height) and whether it changed since the last poll"""
+        if not self.stale:
+            return self.size, False
+        self.stale = False
+        columns, lines = shutil.get_terminal_size(self.fallback)
+        size = (max(self.minimum[0], columns), max(self.minimum[1], lines))
+        changed = size != self.size
+        self.size = size
+        return size, changed
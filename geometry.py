@@ -0,0 +1,85 @@
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+
+class GeometryCache:
+    """Keeps generated coin meshes between frames
+
+    Meshes are keyed on the parameters they were built from (radius,
+    thickness, face type, ...), so a mesh is generated once and only
+    rebuilt when one of those parameters changes.
+    """
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.builds = 0
+
+    def get(self, key, builder, *args):
+        """Return the mesh for key, calling builder(*args) on a miss"""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        mesh = builder(*args)
+        self.entries[key] = mesh
+        self.builds += 1
+
+        # Old parameter sets are dropped once the cache is full
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return mesh
+
+    def invalidate(self):
+        """Drop every cached mesh"""
+        self.entries.clear()
+
+
+# Samples around the rim, and layers across it, for each level of detail
+# a mesh is built at
+DETAIL_LEVELS = (16, 24, 32, 48, 64, 96, 128, 192, 256, 384, 512, 768, 1024, 1536, 2048)
+LAYER_LEVELS = (2, 3, 5, 9, 17, 33, 65)
+
+
+def outline_length(matrix, radius, scale_x, scale_y):
+    """Length in cells the samples around a rotated coin's rim are spread over
+
+    scale_x and scale_y turn view-space units into columns and rows. The
+    rim's circle projects to an ellipse, and evenly spaced samples on the
+    circle land furthest apart at the ends of its minor axis, where they
+    move along the major one. So this is the circumference of a circle as
+    wide as the major axis: that many samples leave no gaps anywhere on
+    the outline, even seen edge-on, where the perimeter is shorter.
+    """
+    axes = np.array([[scale_x], [scale_y]]) * matrix[:2, :2] * radius
+    return 2 * math.pi * np.linalg.svd(axes, compute_uv=False)[0]
+
+
+def axis_length(matrix, length, scale_x, scale_y):
+    """Length in cells of a stretch of the coin's axis once rotated
+
+    This is how far apart the rim's two edges land on screen, so the
+    layers across the rim need to be spread over it.
+    """
+    return length * math.hypot(scale_x * matrix[0, 2], scale_y * matrix[1, 2])
+
+
+def detail_level(length, width, height, levels=DETAIL_LEVELS, per_cell=1):
+    """Fewest rim samples for about per_cell per cell of an outline length cells long
+
+    Outlines are clipped to what can be seen on a width x height screen.
+    """
+    length = min(length, 2 * (width + height)) * per_cell
+    for samples in levels:
+        if samples >= length:
+            return samples
+    return levels[-1]
+
+
+def layer_level(length, levels=LAYER_LEVELS):
+    """Fewest rim layers, evenly spaced, to be at most a cell apart over length cells"""
+    for layers in levels:
+        if layers - 1 >= length:
+            return layers
+    return levels[-1]
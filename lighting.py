@@ -0,0 +1,81 @@
+import numpy as np
+
+# Brightness buckets per unit of brightness. With 1200 the bucket edges
+# fall on every threshold the shaders' ladders use (tenths, and the 1/8
+# and 1/12 steps of the glyph gradients), so compiled ladders are exact.
+LEVELS = 1200
+
+
+def bucket_centres(levels=LEVELS):
+    """Brightness in the middle of every bucket, for compiling ladders"""
+    return np.minimum(1, (np.arange(levels + 1) + 0.5) / levels)
+
+
+def brightness_buckets(brightness, levels=LEVELS):
+    """Bucket index for an array of brightness values"""
+    return (np.clip(brightness, 0, 1) * levels).astype(np.intp)
+
+
+def brightness_bucket(brightness, levels=LEVELS):
+    """Bucket index for a single brightness value"""
+    return int(min(1, max(0, brightness)) * levels)
+
+
+def octahedral_encode(normals):
+    """Map (N,3) directions onto the [-1, 1] square of an octahedral map
+
+    The directions need not be unit length; only their direction counts.
+    """
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    l1 = np.maximum(np.abs(normals).sum(axis=1), 1e-12)
+    u = normals[:, 0] / l1
+    v = normals[:, 1] / l1
+    # The lower hemisphere is folded over the diagonals
+    lower = normals[:, 2] < 0
+    if lower.any():
+        lower_u, lower_v = u[lower], v[lower]
+        u[lower] = np.copysign(1 - np.abs(lower_v), lower_u)
+        v[lower] = np.copysign(1 - np.abs(lower_u), lower_v)
+    return u, v
+
+
+def octahedral_decode(u, v):
+    """Unit directions for points on the octahedral square"""
+    z = 1 - np.abs(u) - np.abs(v)
+    lower = z < 0
+    x = np.where(lower, np.copysign(1 - np.abs(v), u), u)
+    y = np.where(lower, np.copysign(1 - np.abs(u), v), v)
+    normals = np.column_stack((x, y, z))
+    return normals / np.linalg.norm(normals, axis=1)[:, None]
+
+
+class LightingLUT:
+    """Lighting precomputed over an octahedral map of normal directions
+
+    shade(normals) is evaluated once, for the unit normal at the centre
+    of every texel of a resolution x resolution map. Shading a point is
+    then an index into that table, with no normalization, square roots or
+    powers per point. Build a new table when the light setup changes.
+
+    The error of a lookup grows with how steep shade is. At the default
+    256 x 256 it is within 0.02 of Advanced3DCoin's Phong lighting, with
+    its ** 20 highlight, and within 0.012 of HighResCoin's diffuse light.
+    """
+    def __init__(self, shade, resolution=256):
+        self.resolution = resolution
+        centres = (np.arange(resolution) + 0.5) / resolution * 2 - 1
+        u, v = np.meshgrid(centres, centres)
+        self.table = np.asarray(shade(octahedral_decode(u.ravel(), v.ravel())),
+                                dtype=np.float64).reshape(resolution, resolution)
+
+    def texels(self, u, v):
+        """Flat texel index for octahedral coordinates"""
+        scale = self.resolution / 2
+        last = self.resolution - 1
+        row = np.minimum(((v + 1) * scale).astype(np.intp), last)
+        col = np.minimum(((u + 1) * scale).astype(np.intp), last)
+        return row * self.resolution + col
+
+    def lookup(self, normals):
+        """Brightness for an (N,3) array of normals, of any length"""
+        return self.table.ravel().take(self.texels(*octahedral_encode(normals)))
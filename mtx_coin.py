@@ -1,16 +1,64 @@
-import os
-import sys
 import time
 import math
 import random
+import argparse
 import curses
 from enum import Enum
 
+import numpy as np
+
+from geometry import GeometryCache, detail_level, outline_length
+from lighting import bucket_centres
+from profiling import StageProfiler
+from rain import MatrixRain
+from scheduler import FrameScheduler
+from transform import rotation_matrix
+from scene import Scene
+from viewports import BODY, FACE, RIM, ViewportPool, pack_shades, rasterize_viewport
+
 class RenderMode(Enum):
     MATRIX = 1
     MONOCHROME = 2
     MINIMAL = 3
 
+def cell_runs(chars, colors, bridge=False):
+    """Runs of filled cells in a row that share a color
+
+    Returns the rows as strings and the runs as (y, start, end, color).
+    With bridge, runs carry on over the empty cells between filled ones,
+    which are written as spaces, so sparse rows take fewer runs.
+    """
+    filled = chars != 0
+    if bridge:
+        columns = np.arange(chars.shape[1])
+        # Each cell takes the color of the nearest filled cell on its left
+        last = np.maximum.accumulate(np.where(filled, columns, -1), axis=1)
+        later = np.maximum.accumulate(filled[:, ::-1], axis=1)[:, ::-1]
+        colors = np.take_along_axis(colors, np.maximum(last, 0), axis=1)
+        chars = np.where(filled, chars, ord(' ')).astype(np.uint32)
+        filled = (last >= 0) & later
+    same = filled[:, 1:] & filled[:, :-1] & (colors[:, 1:] == colors[:, :-1])
+    starts = filled.copy()
+    starts[:, 1:] &= ~same
+    ends = filled.copy()
+    ends[:, :-1] &= ~same
+    ys, start = np.nonzero(starts)
+    _, end = np.nonzero(ends)
+    # Each row as one string; empty cells are NUL, but no run covers them
+    rows = np.ascontiguousarray(chars).view(f'<U{chars.shape[1]}')[:, 0].tolist()
+    return rows, zip(ys.tolist(), start.tolist(), (end + 1).tolist(), colors[ys, start].tolist())
+
+
+def draw_cells(surface, chars, colors, attrs, origin=(0, 0), bridge=False):
+    """Write glyph and color planes to a curses window, one addstr per run"""
+    top, left = origin
+    rows, runs = cell_runs(chars, colors, bridge)
+    for y, start, end, color in runs:
+        try:
+            surface.addstr(top + y, left + start, rows[y][start:end], attrs(color))
+        except curses.error:
+            pass  # The bottom-right cell of a window can not be written
+
 class CoinWindow:
     """Individual viewport for coin rendering"""
     def __init__(self, x, y, width, height, label=""):
@@ -19,15 +67,34 @@ class CoinWindow:
         self.width = width
         self.height = height
         self.label = label
-        self.zbuffer = []
-        self.buffer = []
+        
+        # Glyph code point (0 for empty) and color pair of every cell
+        self.chars = np.zeros((height, width), dtype=np.uint32)
+        self.colors = np.zeros((height, width), dtype=np.uint8)
+        
+        # Curses window the cells are drawn to, at origin within it
+        self.surface = None
+        self.origin = (0, 0)
         
     def clear(self):
-        self.buffer = [[' ' for _ in range(self.width)] for _ in range(self.height)]
-        self.zbuffer = [[float('-inf') for _ in range(self.width)] for _ in range(self.height)]
+        self.chars.fill(0)
+        self.colors.fill(0)
+    
+    def attach(self, stdscr):
+        """Give the window its own curses subwindow of stdscr, where it fits"""
+        try:
+            self.surface = stdscr.derwin(self.height, self.width, self.y, self.x)
+            self.origin = (0, 0)
+        except curses.error:
+            self.surface = stdscr
+            self.origin = (self.y, self.x)
+    
+    def draw(self, attrs):
+        """Write the cells to the window's surface, one addstr per run"""
+        draw_cells(self.surface, self.chars, self.colors, attrs, self.origin)
 
 class Matrix3DCoin:
-    def __init__(self):
+    def __init__(self, workers=0, rain_density=0.25, rain_spawn=0.1):
         # Display settings
         self.render_mode = RenderMode.MATRIX
         self.show_particles = False
@@ -43,23 +110,47 @@ class Matrix3DCoin:
         self.rotation_z = 0
         self.rotation_speed = 0.05
         self.time_offset = 0
+        self.frame_count = 0
         
         # Camera distance
         self.camera_distance = 40
         
         # Matrix rain effect
         self.matrix_chars = "01ｱｲｳｴｵｶｷｸｹｺｻｼｽｾｿﾀﾁﾂﾃﾄﾅﾆﾇﾈﾉﾊﾋﾌﾍﾎﾏﾐﾑﾒﾓﾔﾕﾖﾗﾘﾙﾚﾛﾜﾝ"
-        self.matrix_drops = []
+        self.rain_density = rain_density
+        self.rain_spawn = rain_spawn
+        self.rain = None
+        
+        # Glyph choices and color for every brightness bucket of the coin body
+        self.matrix_shades = [self.matrix_shade(brightness) for brightness in bucket_centres().tolist()]
+        self.shades = pack_shades(self.matrix_shades)
+        # Seeded from random, so random.seed() makes the rain repeatable
+        self.rng = np.random.default_rng(random.getrandbits(64))
         
         # Trail effect for coin movement
         self.coin_trail = []
         self.max_trail_length = 5
         
+        # Coin mesh is shared by every window and frame, and windows with
+        # the same view share its transformed points
+        self.geometry = GeometryCache()
+        self.scene = Scene(self.geometry)
+        
+        # Frame pacing and per-stage timings
+        self.scheduler = FrameScheduler(fps=30)
+        self.profiler = StageProfiler()
+        
+        # curses attributes for each color pair, looked up once
+        self.color_attrs = {}
+        
+        # Optional worker processes that render the windows in parallel
+        self.pool = ViewportPool(workers) if workers else None
+        
     def init_curses(self, stdscr):
         """Initialize curses color pairs"""
         curses.curs_set(0)  # Hide cursor
         stdscr.nodelay(1)   # Non-blocking input
-        stdscr.timeout(30)  # 30ms refresh
+        stdscr.timeout(0)   # Frame pacing is left to the scheduler
         
         # Initialize color pairs for Matrix effect
         if curses.has_colors():
@@ -103,14 +194,13 @@ class Matrix3DCoin:
             
         return face
     
-    def generate_coin_points(self):
-        """Generate 3D points for a clean coin surface"""
+    def generate_coin_points(self, steps=36):
+        """Generate 3D points for a clean coin surface, steps points around the rim"""
         points = []
         
         # Create coin body - circular disc
-        steps = 36  # Increased for smoother edges
-        for angle in range(0, 360, 360 // steps):
-            rad = math.radians(angle)
+        for i in range(steps):
+            rad = 2 * math.pi * i / steps
             
             # Edge points
             x = self.coin_radius * math.cos(rad)
@@ -120,10 +210,13 @@ class Matrix3DCoin:
             for z in range(-self.coin_thickness, self.coin_thickness + 1):
                 points.append((x, y, z, 'rim'))
             
-        # Create front and back faces
-        for r in range(0, self.coin_radius, 2):
-            for angle in range(0, 360, 15):
-                rad = math.radians(angle)
+        # Create front and back faces, with rings as far apart as the rim
+        # points and each ring sampled as densely as the rim
+        spacing = 2 * math.pi * self.coin_radius / steps
+        for r in np.arange(0, self.coin_radius, spacing).tolist():
+            ring = max(1, round(steps * r / self.coin_radius))
+            for i in range(ring):
+                rad = 2 * math.pi * i / ring
                 x = r * math.cos(rad)
                 y = r * math.sin(rad)
                 
@@ -143,133 +236,142 @@ class Matrix3DCoin:
             
         return points
     
-    def rotate_3d(self, x, y, z, rx, ry, rz):
-        """Apply 3D rotation transformations"""
-        # Rotate around X axis
-        cos_x, sin_x = math.cos(rx), math.sin(rx)
-        y, z = y * cos_x - z * sin_x, y * sin_x + z * cos_x
-        
-        # Rotate around Y axis
-        cos_y, sin_y = math.cos(ry), math.sin(ry)
-        x, z = x * cos_y + z * sin_y, -x * sin_y + z * cos_y
-        
-        # Rotate around Z axis
-        cos_z, sin_z = math.cos(rz), math.sin(rz)
-        x, y = x * cos_z - y * sin_z, x * sin_z + y * cos_z
-        
-        return x, y, z
+    def build_point_cloud(self, steps=36):
+        """Pack the coin points into an (N,3) array, their kinds and face glyphs"""
+        points = self.generate_coin_points(steps)
+        xyz = np.array([point[:3] for point in points], dtype=np.float64)
+        kinds = np.array([RIM if ptype == 'rim' else BODY if ptype in ('front', 'back') else FACE
+                          for *_, ptype in points], dtype=np.int8)
+        glyphs = np.array([ord(ptype) if kind == FACE else 0
+                           for (*_, ptype), kind in zip(points, kinds)], dtype=np.uint32)
+        for array in (xyz, kinds, glyphs):
+            array.flags.writeable = False
+        return xyz, kinds, glyphs
     
-    def project_to_screen(self, x, y, z, window):
-        """Project 3D coordinates to 2D screen space"""
-        if z + self.camera_distance <= 0:
-            return None, None, None
-            
-        factor = self.camera_distance / (z + self.camera_distance)
-        screen_x = int(window.width // 2 + x * factor)
-        screen_y = int(window.height // 2 + y * factor * 0.5)  # Aspect correction
-        depth = 1 / (z + self.camera_distance)
-        
-        return screen_x, screen_y, depth
+    def matrix_shade(self, brightness):
+        """Glyph choices and color pair for the coin body in Matrix mode"""
+        if brightness > 0.7:
+            return self.matrix_chars, 2
+        elif brightness > 0.3:
+            return ('░', '▒', '▓'), 1
+        else:
+            return ('░',), 3
     
-    def render_coin_to_window(self, window, offset_x=0, offset_y=0, time_offset=0):
-        """Render coin to a specific window"""
-        window.clear()
-        points = self.generate_coin_points()
-        
-        # Apply rotation with time offset for different phases
+    def window_matrix(self, time_offset):
+        """Rotation for a window, with a time offset for different phases"""
         rx = self.rotation_x + time_offset * 0.5
         ry = self.rotation_y + time_offset
         rz = self.rotation_z + time_offset * 0.3
+        return rotation_matrix(rx, ry, rz)
+    
+    def detail_samples(self, window, time_offset=0):
+        """Rim samples that cover the coin's outline in a window about once per cell"""
+        radius = self.coin_radius
+        scale = self.camera_distance / max(self.camera_distance - radius, 1)  # Nearest rim point
+        return detail_level(outline_length(self.window_matrix(time_offset), radius, scale, scale / 2),
+                            window.width, window.height)
+    
+    def coin_instance(self, offset_x=0, offset_y=0, time_offset=0, steps=36):
+        """The coin placed in the scene for one view, with steps points around its rim"""
+        return self.scene.instance((self.coin_radius, self.coin_thickness, steps),
+                                   lambda: self.build_point_cloud(steps),
+                                   self.window_matrix(time_offset), (offset_x, offset_y, 0))
+    
+    def shading_args(self):
+        """rasterize_viewport arguments that follow the mesh"""
+        return (self.camera_distance, self.coin_thickness,
+                self.render_mode == RenderMode.MATRIX, self.shades)
+    
+    def render_instance(self, window, instance):
+        """Rasterize a coin instance into a window"""
+        rasterize_viewport(window.chars, window.colors, self.scene.points(instance), instance.mesh,
+                           *self.shading_args(), rng=self.rng)
+    
+    def render_coin_to_window(self, window, offset_x=0, offset_y=0, time_offset=0):
+        """Render coin to a specific window"""
+        steps = self.detail_samples(window, time_offset)
+        self.render_instance(window, self.coin_instance(offset_x, offset_y, time_offset, steps))
+    
+    def window_views(self, windows, frame_count):
+        """Each window with the offsets and phase of its view"""
+        views = []
+        for i, window in enumerate(windows):
+            if i == 0:  # Front view - slow rotation
+                views.append((window, 0, 0, frame_count * 0.02))
+            elif i == 1:  # Side view
+                views.append((window, 0, 0, math.pi/2))
+            elif i == 2:  # Perspective view
+                offset = math.sin(frame_count * 0.05) * 5
+                views.append((window, offset, 0, frame_count * 0.05))
+            else:  # Normal rotating
+                views.append((window, 0, 0, 0))
+        return views
+    
+    def render_windows(self, windows, frame_count):
+        """Render the coin in every window, on the worker pool if there is one
         
-        for point in points:
-            x, y, z, ptype = point[0] + offset_x, point[1] + offset_y, point[2], point[3]
-            
-            # Rotate point
-            x, y, z = self.rotate_3d(x, y, z, rx, ry, rz)
-            
-            # Project to screen
-            sx, sy, depth = self.project_to_screen(x, y, z, window)
-            
-            if sx is None or not (0 <= sx < window.width and 0 <= sy < window.height):
-                continue
-                
-            if depth > window.zbuffer[sy][sx]:
-                window.zbuffer[sy][sx] = depth
-                
-                # Choose character based on type and mode
-                if self.render_mode == RenderMode.MATRIX:
-                    if ptype in ['●', '‾', '_', '|']:  # Face components
-                        char = ptype
-                        color = 2  # Bright white for face
-                    elif ptype == 'rim':
-                        char = random.choice(['█', '▓', '▒'])
-                        color = 1 if z > 0 else 3  # Green gradient
-                    else:
-                        brightness = max(0, min(1, (z + self.coin_thickness) / (2 * self.coin_thickness)))
-                        if brightness > 0.7:
-                            char = random.choice(self.matrix_chars)
-                            color = 2
-                        elif brightness > 0.3:
-                            char = random.choice(['░', '▒', '▓'])
-                            color = 1
-                        else:
-                            char = '░'
-                            color = 3
-                else:  # MONOCHROME mode
-                    if ptype in ['●', '‾', '_', '|']:
-                        char = ptype
-                        color = 0
-                    else:
-                        char = '█' if z > 0 else '▓'
-                        color = 0
-                        
-                window.buffer[sy][sx] = (char, color)
+        Windows of the same size showing the same instance are rendered
+        once and copied. Every window uses the level of detail the most
+        demanding one needs, so they all share one mesh.
+        """
+        self.scene.begin_frame()
+        views = self.window_views(windows, frame_count)
+        steps = max(self.detail_samples(window, time_offset) for window, _, _, time_offset in views)
+        groups = {}
+        for window, *view in views:
+            instance = self.coin_instance(*view, steps)
+            groups.setdefault((instance.key, window.chars.shape), (instance, []))[1].append(window)
+        groups = list(groups.values())
+        
+        if self.pool is None:
+            for instance, (window, *_) in groups:
+                self.render_instance(window, instance)
+        else:
+            instance = groups[0][0]
+            self.pool.upload(instance.mesh_key, instance.mesh)
+            self.pool.render([(window, instance.matrix, instance.offset, *self.shading_args())
+                              for instance, (window, *_) in groups])
+        
+        for _, (window, *copies) in groups:
+            for copy in copies:
+                copy.chars[...] = window.chars
+                copy.colors[...] = window.colors
     
     def update_matrix_rain(self, height, width):
         """Update Matrix-style rain effect in background"""
-        # Add new drops
-        if len(self.matrix_drops) < width // 4 and random.random() < 0.1:
-            self.matrix_drops.append({
-                'x': random.randint(0, width - 1),
-                'y': 0,
-                'speed': random.uniform(0.5, 2),
-                'chars': [random.choice(self.matrix_chars) for _ in range(random.randint(5, 15))]
-            })
-        
-        # Update existing drops
-        for drop in self.matrix_drops[:]:
-            drop['y'] += drop['speed']
-            if drop['y'] > height:
-                self.matrix_drops.remove(drop)
+        if self.rain is None:
+            self.rain = MatrixRain(self.matrix_chars, width, self.rng,
+                                   self.rain_density, self.rain_spawn)
+        elif self.rain.width != width:
+            self.rain.resize(width)
+        self.rain.update(height)
+    
+    def color_attr(self, pair):
+        """curses attribute for a color pair"""
+        attr = self.color_attrs.get(pair)
+        if attr is None:
+            attr = self.color_attrs[pair] = curses.color_pair(pair)
+        return attr
     
     def draw_window_border(self, stdscr, window, active=False):
         """Draw border around window"""
-        color = curses.color_pair(5) if active else curses.color_pair(3)
+        color = self.color_attr(5 if active else 3)
         
-        # Top and bottom borders
-        for x in range(window.width):
+        # Top and bottom borders with their corners, one string each
+        horizontal = '═' * window.width
+        for y, left, right in ((window.y - 1, '╔', '╗'), (window.y + window.height, '╚', '╝')):
             try:
-                stdscr.addstr(window.y - 1, window.x + x, '═', color)
-                stdscr.addstr(window.y + window.height, window.x + x, '═', color)
+                stdscr.addstr(y, window.x - 1, left + horizontal + right, color)
             except:
                 pass
                 
         # Side borders
-        for y in range(window.height):
-            try:
-                stdscr.addstr(window.y + y, window.x - 1, '║', color)
-                stdscr.addstr(window.y + y, window.x + window.width, '║', color)
-            except:
-                pass
-                
-        # Corners
-        try:
-            stdscr.addstr(window.y - 1, window.x - 1, '╔', color)
-            stdscr.addstr(window.y - 1, window.x + window.width, '╗', color)
-            stdscr.addstr(window.y + window.height, window.x - 1, '╚', color)
-            stdscr.addstr(window.y + window.height, window.x + window.width, '╝', color)
-        except:
-            pass
+        for y in range(window.y, window.y + window.height):
+            for x in (window.x - 1, window.x + window.width):
+                try:
+                    stdscr.addstr(y, x, '║', color)
+                except:
+                    pass
             
         # Label
         if window.label:
@@ -279,14 +381,8 @@ class Matrix3DCoin:
             except:
                 pass
     
-    def run(self, stdscr):
-        """Main animation loop"""
-        self.init_curses(stdscr)
-        
-        # Get terminal dimensions
-        height, width = stdscr.getmaxyx()
-        
-        # Create four windows in quadrants
+    def create_windows(self, height, width):
+        """Create four windows in quadrants of a height x width screen"""
         win_w = width // 2 - 4
         win_h = height // 2 - 3
         
@@ -296,71 +392,84 @@ class Matrix3DCoin:
             CoinWindow(2, height // 2 + 1, win_w, win_h, "PERSPECTIVE"),
             CoinWindow(width // 2 + 2, height // 2 + 1, win_w, win_h, "ROTATING")
         ]
+        if self.pool is not None:
+            self.pool.share(windows)
+        return windows
+    
+    def update(self, frames, height, width):
+        """Advance the animation by a number of frames"""
+        self.rotation_x += self.rotation_speed * 0.7 * frames
+        self.rotation_y += self.rotation_speed * frames
+        self.rotation_z += self.rotation_speed * 0.3 * frames
+        self.frame_count += frames
+        
+        # Update Matrix rain
+        with self.profiler.stage('rain'):
+            for _ in range(frames):
+                self.update_matrix_rain(height, width)
+    
+    def draw(self, stdscr, windows, active_window):
+        """Draw the rain, every coin window and the status bar"""
+        height, width = stdscr.getmaxyx()
+        frame_count = self.frame_count
+        # Blank the frame without forcing curses to repaint the terminal
+        stdscr.erase()
+        
+        # Draw Matrix rain in background
+        with self.profiler.stage('rain'):
+            if self.rain is not None:
+                chars, colors = self.rain.planes(height)
+                draw_cells(stdscr, chars, colors, self.color_attr, bridge=True)
+        
+        # Render coin in each window with different perspectives
+        with self.profiler.stage('coin'):
+            self.render_windows(windows, frame_count)
+        
+        for i, window in enumerate(windows):
+            with self.profiler.stage('draw'):
+                # Draw window border
+                self.draw_window_border(stdscr, window, i == active_window)
+            
+                # Draw window contents into its subwindow
+                if window.surface is None:
+                    window.attach(stdscr)
+                window.draw(self.color_attr)
+        
+        # Draw status bar
+        status = f" MATRIX COIN | Frame: {frame_count} | Mode: {self.render_mode.name} | Press Q to quit "
+        if self.profiler.show_hud:
+            status += f"| {self.profiler.hud()} "
+        status = status[:width - 1]
+        try:
+            stdscr.addstr(height - 1, (width - len(status)) // 2, status, 
+                        self.color_attr(5) | curses.A_REVERSE)
+        except:
+            pass
+    
+    def present(self, stdscr, windows):
+        """Send the frame to the terminal with a single update"""
+        stdscr.noutrefresh()
+        for window in windows:
+            if window.surface is not None and window.surface is not stdscr:
+                window.surface.noutrefresh()
+        curses.doupdate()
+    
+    def run(self, stdscr):
+        """Main animation loop"""
+        self.init_curses(stdscr)
+        
+        # Get terminal dimensions
+        height, width = stdscr.getmaxyx()
+        windows = self.create_windows(height, width)
         
-        frame_count = 0
         active_window = 0
+        frames = 1
         
         try:
             while True:
-                stdscr.clear()
-                
-                # Update animations
-                self.rotation_x += self.rotation_speed * 0.7
-                self.rotation_y += self.rotation_speed
-                self.rotation_z += self.rotation_speed * 0.3
-                frame_count += 1
-                
-                # Update Matrix rain
-                self.update_matrix_rain(height, width)
-                
-                # Draw Matrix rain in background
-                for drop in self.matrix_drops:
-                    for i, char in enumerate(drop['chars']):
-                        y = int(drop['y']) - i
-                        if 0 <= y < height:
-                            try:
-                                color = curses.color_pair(1 if i > 0 else 2)
-                                stdscr.addstr(y, drop['x'], char, color)
-                            except:
-                                pass
-                
-                # Render coin in each window with different perspectives
-                for i, window in enumerate(windows):
-                    if i == 0:  # Front view - slow rotation
-                        self.render_coin_to_window(window, 0, 0, frame_count * 0.02)
-                    elif i == 1:  # Side view
-                        self.render_coin_to_window(window, 0, 0, math.pi/2)
-                    elif i == 2:  # Perspective view
-                        offset = math.sin(frame_count * 0.05) * 5
-                        self.render_coin_to_window(window, offset, 0, frame_count * 0.05)
-                    else:  # Normal rotating
-                        self.render_coin_to_window(window, 0, 0, 0)
-                    
-                    # Draw window border
-                    self.draw_window_border(stdscr, window, i == active_window)
-                    
-                    # Draw window contents
-                    for y in range(window.height):
-                        for x in range(window.width):
-                            if window.buffer[y][x] != ' ':
-                                char, color = window.buffer[y][x]
-                                try:
-                                    stdscr.addstr(
-                                        window.y + y,
-                                        window.x + x,
-                                        char,
-                                        curses.color_pair(color)
-                                    )
-                                except:
-                                    pass
-                
-                # Draw status bar
-                status = f" MATRIX COIN | Frame: {frame_count} | Mode: {self.render_mode.name} | Press Q to quit "
-                try:
-                    stdscr.addstr(height - 1, (width - len(status)) // 2, status, 
-                                curses.color_pair(5) | curses.A_REVERSE)
-                except:
-                    pass
+                # Update animations, including any skipped frames
+                self.update(frames, height, width)
+                self.draw(stdscr, windows, active_window)
                 
                 # Handle input
                 key = stdscr.getch()
@@ -371,6 +480,12 @@ class Matrix3DCoin:
                     modes = list(RenderMode)
                     current_idx = modes.index(self.render_mode)
                     self.render_mode = modes[(current_idx + 1) % len(modes)]
+                elif key == ord('p') or key == ord('P'):
+                    # Capture the next frames with cProfile
+                    self.profiler.request_capture()
+                elif key == ord('h') or key == ord('H'):
+                    # Toggle the stage timings in the status bar
+                    self.profiler.show_hud = not self.profiler.show_hud
                 elif key == ord(' '):
                     # Pause/unpause
                     self.rotation_speed = 0 if self.rotation_speed > 0 else 0.05
@@ -379,12 +494,16 @@ class Matrix3DCoin:
                 elif key == curses.KEY_LEFT:
                     active_window = (active_window - 1) % 4
                 
-                stdscr.refresh()
-                time.sleep(0.03)
+                with self.profiler.stage('write'):
+                    self.present(stdscr, windows)
+                self.profiler.end_frame()
+                frames = self.scheduler.wait()
                 
         except KeyboardInterrupt:
             pass
         finally:
+            self.close()
+            
             # Clean exit message
             stdscr.clear()
             msg = "✨ MATRIX COIN ANIMATION ENDED ✨"
@@ -393,9 +512,25 @@ class Matrix3DCoin:
             stdscr.refresh()
             time.sleep(1)
 
+    def close(self):
+        """Stop the worker pool, if any"""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
 def main():
     """Entry point with curses wrapper"""
-    coin = Matrix3DCoin()
+    parser = argparse.ArgumentParser(description="Matrix-style rotating coin in four viewports")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="render the viewports on this many worker processes; only worth "
+                             "it with a spare CPU core per worker, as on one core the pool is "
+                             "slower than rendering in process")
+    parser.add_argument('--rain-density', type=float, default=0.25,
+                        help="largest fraction of columns with a falling drop")
+    parser.add_argument('--rain-spawn', type=float, default=0.1,
+                        help="mean number of new drops per frame")
+    args = parser.parse_args()
+    coin = Matrix3DCoin(args.workers, args.rain_density, args.rain_spawn)
     curses.wrapper(coin.run)
 
 if __name__ == '__main__':
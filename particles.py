@@ -0,0 +1,108 @@
+import math
+
+import numpy as np
+
+from transform import rotate_points
+
+GLYPHS = ['*', '·', '°', '˚', '✦', '✧', '⋆', '₊']
+
+
+class ParticlePool:
+    """Fixed-capacity particle system kept as parallel arrays
+
+    The live particles fill the first len(pool) slots. Spawning writes a
+    whole batch into the free slots after them, and dead particles are
+    swap-removed: live ones from the end move into their slots, so the
+    arrays never grow and stay packed however many particles come and go.
+    """
+    def __init__(self, capacity, rng):
+        self.rng = rng
+        self.count = 0
+
+        # Depth plane for project(), only reallocated when the screen resizes
+        self.depth = np.empty(0)
+        self.resize(capacity)
+
+    def resize(self, capacity):
+        """Change the capacity, keeping as many live particles as fit"""
+        keep = min(self.count, capacity)
+        arrays = {
+            'position': np.zeros((capacity, 3)),
+            'velocity': np.zeros((capacity, 3)),
+            'life': np.zeros(capacity, dtype=np.int32),
+            'glyph': np.zeros(capacity, dtype=np.uint8),
+            'color': np.zeros(capacity, dtype=np.uint8),
+        }
+        for name, array in arrays.items():
+            if keep:
+                array[:keep] = getattr(self, name)[:keep]
+            setattr(self, name, array)
+        self.capacity = capacity
+        self.count = keep
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, count, radius, colors, life=20):
+        """Start up to count sparkles around a ring just outside radius"""
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return
+        slots = slice(self.count, self.count + count)
+        rng = self.rng
+        angle = rng.uniform(0, 2 * math.pi, count)
+        r = radius + rng.uniform(2, 5, count)
+        self.position[slots] = np.column_stack((r * np.cos(angle), r * np.sin(angle),
+                                                rng.uniform(-5, 5, count)))
+        self.velocity[slots] = rng.uniform((-0.5, -0.5, -0.3), (0.5, 0.5, 0.3), (count, 3))
+        self.life[slots] = life
+        self.glyph[slots] = rng.integers(0, len(GLYPHS), count)
+        self.color[slots] = rng.integers(0, colors, count)
+        self.count += count
+
+    def step(self):
+        """Move every particle by its velocity and retire the expired ones"""
+        live = slice(0, self.count)
+        self.position[live] += self.velocity[live]
+        self.life[live] -= 1
+        self.remove(np.flatnonzero(self.life[live] <= 0))
+
+    def remove(self, dead):
+        """Swap-remove the particles in the sorted slots dead"""
+        if not len(dead):
+            return
+        count = self.count - len(dead)
+        # Survivors past the new end move down into the holes before it
+        tail = np.ones(self.count - count, dtype=bool)
+        tail[dead[dead >= count] - count] = False
+        movers = np.flatnonzero(tail) + count
+        holes = dead[dead < count]
+        for array in (self.position, self.velocity, self.life, self.glyph, self.color):
+            array[holes] = array[movers]
+        self.count = count
+
+    def project(self, matrix, width, height, distance):
+        """Rotate and project the particles onto a width x height screen
+
+        Returns the rows, columns and slots of the nearest particle in
+        every cell they reach (the first one on ties).
+        """
+        x, y, z = rotate_points(self.position[:self.count], matrix).T
+        dist = z + distance
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ooz = np.where(dist > 0, 1 / dist, np.nan)
+            xp = np.trunc(width / 2 + x * ooz * distance)
+            yp = np.trunc(height / 2 - y * ooz * distance / 2)
+            inside = (xp >= 0) & (xp < width) & (yp >= 0) & (yp < height)
+        slots = np.flatnonzero(inside)
+        cell = yp[slots].astype(np.intp) * width + xp[slots].astype(np.intp)
+        depth = ooz[slots]
+
+        # Depth test with a scatter-max, keeping the first particle on ties
+        if self.depth.size != height * width:
+            self.depth = np.empty(height * width)
+        self.depth.fill(-np.inf)
+        np.maximum.at(self.depth, cell, depth)
+        front = np.flatnonzero(depth == self.depth[cell])
+        cells, first = np.unique(cell[front], return_index=True)
+        return cells // width, cells % width, slots[front[first]]
@@ -0,0 +1,114 @@
+import cProfile
+import os
+import signal
+import time
+
+
+class Stage:
+    """Context manager that times one pipeline stage
+
+    Start times are kept on a stack, so the stage can be entered again
+    while it is already open. Only the outermost entry is recorded, as
+    the nested ones are part of its time.
+    """
+    __slots__ = ('profiler', 'name', 'starts')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.starts = []
+
+    def __enter__(self):
+        self.starts.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc_info):
+        start = self.starts.pop()
+        if not self.starts:
+            self.profiler.record(self.name, time.perf_counter() - start)
+        return False
+
+
+class StageProfiler:
+    """Per-stage frame timings plus an on-demand cProfile capture
+
+    Wrap each pipeline stage in `with profiler.stage('transform'):` and
+    call end_frame() once per frame. A stage entered several times in a
+    frame is summed, and the per-frame totals are smoothed so they can be
+    shown live in a status line via hud().
+
+    Setting TERMINAL_FUN_HUD=1 turns the overlay on. Setting
+    TERMINAL_FUN_PROFILE=N captures the first N frames with cProfile, and
+    a capture of the next N frames can be requested at any time with
+    request_capture(), from a key binding or SIGUSR1.
+    """
+    def __init__(self, smoothing=0.1, capture_frames=60, output_dir='.'):
+        self.smoothing = smoothing
+        self.capture_frames = capture_frames
+        self.output_dir = output_dir
+        self.timings = {}
+        self.frame_totals = {}
+        self.stages = {}
+        self.show_hud = os.environ.get('TERMINAL_FUN_HUD', '') not in ('', '0')
+
+        # cProfile capture state
+        self.pending = 0
+        self.remaining = 0
+        self.profile = None
+        self.last_capture = None
+        frames = os.environ.get('TERMINAL_FUN_PROFILE')
+        if frames:
+            self.request_capture(int(frames))
+
+    def stage(self, name):
+        """Return the timing context manager for a stage"""
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = Stage(self, name)
+        return stage
+
+    def record(self, name, seconds):
+        """Add one stage timing to the current frame"""
+        self.frame_totals[name] = self.frame_totals.get(name, 0.0) + seconds
+
+    def hud(self):
+        """Short summary of the stage timings for a status line"""
+        parts = [f"{name} {seconds * 1000:.1f}" for name, seconds in self.timings.items()]
+        text = "ms: " + ' '.join(parts)
+        if self.profile is not None:
+            text += f" | REC {self.remaining}"
+        return text
+
+    def request_capture(self, frames=None):
+        """Profile the next frames with cProfile, starting at the next frame"""
+        self.pending = frames or self.capture_frames
+
+    def install_signal(self, signum=getattr(signal, 'SIGUSR1', None)):
+        """Request a capture whenever the process receives signum"""
+        if signum is not None:
+            signal.signal(signum, lambda *args: self.request_capture())
+
+    def end_frame(self):
+        """Mark a frame boundary, starting or finishing a pending capture"""
+        # Fold this frame's stage totals into the running averages
+        for name, seconds in self.frame_totals.items():
+            previous = self.timings.get(name)
+            if previous is None:
+                self.timings[name] = seconds
+            else:
+                self.timings[name] = previous + (seconds - previous) * self.smoothing
+        self.frame_totals.clear()
+
+        if self.profile is not None:
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self.profile.disable()
+                name = f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.prof"
+                self.last_capture = os.path.join(self.output_dir, name)
+                self.profile.dump_stats(self.last_capture)
+                self.profile = None
+        elif self.pending:
+            self.remaining = self.pending
+            self.pending = 0
+            self.profile = cProfile.Profile()
+            self.profile.enable()
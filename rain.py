@@ -0,0 +1,71 @@
+import numpy as np
+
+# Longest trail a drop can have
+MAX_LENGTH = 15
+
+# Color pairs of a drop's head and of the rest of its trail
+HEAD, TAIL = 2, 1
+
+
+class MatrixRain:
+    """Matrix rain kept as per-column NumPy state
+
+    Every column holds at most one drop: whether it is falling, the row
+    of its head, its speed and trail length, and a buffer with the glyph
+    of every trail position, counted up from the head. A frame moves all
+    the drops at once and scatters their trails into a glyph plane and a
+    color plane, ready to be written out in row runs.
+    """
+    def __init__(self, glyphs, width, rng, density=0.25, spawn=0.1):
+        self.alphabet = np.array([ord(char) for char in glyphs], dtype=np.uint32)
+        self.rng = rng
+        self.density = density  # Most columns that may have a drop at once
+        self.spawn = spawn      # Mean number of new drops per frame
+        self.resize(width)
+
+    def resize(self, width):
+        """Start over with no drops on a screen width columns wide"""
+        self.width = width
+        self.active = np.zeros(width, dtype=bool)
+        self.head = np.zeros(width)
+        self.speed = np.zeros(width)
+        self.length = np.zeros(width, dtype=np.intp)
+        self.trail = np.zeros((width, MAX_LENGTH), dtype=np.uint32)
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def update(self, height):
+        """Start new drops and move every drop down by its speed"""
+        # Add new drops in free columns
+        free = np.flatnonzero(~self.active)
+        count = min(self.rng.poisson(self.spawn), int(self.width * self.density) - len(self), len(free))
+        if count > 0:
+            columns = self.rng.choice(free, count, replace=False)
+            self.active[columns] = True
+            self.head[columns] = 0
+            self.speed[columns] = self.rng.uniform(0.5, 2, count)
+            self.length[columns] = self.rng.integers(5, MAX_LENGTH + 1, count)
+            self.trail[columns] = self.alphabet[self.rng.integers(0, len(self.alphabet), (count, MAX_LENGTH))]
+
+        # Update existing drops, retiring the ones that fell off the bottom
+        self.head += np.where(self.active, self.speed, 0)
+        self.active &= self.head <= height
+
+    def planes(self, height):
+        """Glyph code points (0 for empty) and color pairs of the rain"""
+        chars = np.zeros((height, self.width), dtype=np.uint32)
+        colors = np.zeros((height, self.width), dtype=np.uint8)
+        columns = np.flatnonzero(self.active)
+        lengths = self.length[columns]
+
+        # One entry per trail cell: its column and position behind the head
+        cell_columns = np.repeat(columns, lengths)
+        position = np.arange(len(cell_columns)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        rows = np.repeat(self.head[columns].astype(np.intp), lengths) - position
+        visible = (rows >= 0) & (rows < height)
+        cell_columns, position, rows = cell_columns[visible], position[visible], rows[visible]
+
+        chars[rows, cell_columns] = self.trail[cell_columns, position]
+        colors[rows, cell_columns] = np.where(position == 0, HEAD, TAIL)
+        return chars, colors
@@ -1,81 +1,96 @@
-import os
-import sys
-import time
 import math
 
-def clear_screen():
-    # Clear the terminal screen
-    sys.stdout.write('\033[2J')
-    sys.stdout.write('\033[H')
-    sys.stdout.flush()
+import numpy as np
 
-def main():
-    # Terminal dimensions
-    width = 80
-    height = 24
+from frame_cache import FrameCache, rotation_period
+from framebuffer import FrameBuffer
+from lighting import brightness_bucket, bucket_centres
+from scheduler import FrameScheduler
+from screen import FrameDiffWriter
 
-    # Parameters for the coin
-    angle_increment = 10  # Adjust for rotation speed
+def shade(luminance):
+    # Use luminance to simulate shading
+    if luminance > 0.7:
+        return '@'
+    elif luminance > 0.5:
+        return '#'
+    elif luminance > 0.3:
+        return '*'
+    elif luminance > 0.1:
+        return ':'
+    else:
+        return '.'
 
-    try:
-        angle = 0.0
-        while True:
-            clear_screen()
-            output = [' ' for _ in range(width * height)]
-            zbuffer = [float('-inf') for _ in range(width * height)]
-
-            # Parameters for the ellipse (coin projection)
-            for y in range(-10, 11):
-                for x in range(-20, 21):
-                    # Calculate the rotated coordinates
-                    theta = angle
-                    cos_theta = math.cos(theta)
-                    sin_theta = math.sin(theta)
-
-                    # Rotate the point around the X-axis to simulate tilting
-                    X = x
-                    Y = y * cos_theta
-                    Z = y * sin_theta
-
-                    # Perspective projection
-                    K1 = 30  # Distance from viewer to screen
-                    if Z + K1 == 0:
-                        continue  # Avoid division by zero
-                    ooz = 1 / (Z + K1)
-
-                    xp = int(width / 2 + X * ooz * K1)
-                    yp = int(height / 2 - Y * ooz * K1)
-
-                    idx = xp + yp * width
-                    if 0 <= idx < len(output):
-                        if ooz > zbuffer[idx]:
-                            zbuffer[idx] = ooz
-                            # Use luminance to simulate shading
-                            luminance = max(0, cos_theta)
-                            if luminance > 0.7:
-                                char = '@'
-                            elif luminance > 0.5:
-                                char = '#'
-                            elif luminance > 0.3:
-                                char = '*'
-                            elif luminance > 0.1:
-                                char = ':'
-                            else:
-                                char = '.'
-                            output[idx] = char
+# The shading ladder compiled once into a table of brightness buckets
+SHADES = [shade(luminance) for luminance in bucket_centres().tolist()]
 
-            # Render the frame
-            for i in range(0, len(output), width):
-                print(''.join(output[i:i+width]))
+def render_frame(angle, width, height, buffer=None):
+    # Draw into the caller's buffer, reused from frame to frame
+    if buffer is None:
+        buffer = FrameBuffer(width, height)
+    buffer.resize(width, height)
+    buffer.reset()
+
+    # The whole ring shares one luminance per frame
+    char = SHADES[brightness_bucket(math.cos(angle))]
+
+    # Parameters for the ellipse (coin projection), every point at once
+    y, x = np.mgrid[-10:11, -20:21].reshape(2, -1)
+
+    # Rotate the points around the X-axis to simulate tilting
+    theta = angle
+    cos_theta = math.cos(theta)
+    sin_theta = math.sin(theta)
+    X = x
+    Y = y * cos_theta
+    Z = y * sin_theta
+
+    # Perspective projection, skipping points level with the viewer
+    K1 = 30  # Distance from viewer to screen
+    ahead = Z + K1 != 0
+    X, Y, Z = X[ahead], Y[ahead], Z[ahead]
+    ooz = 1 / (Z + K1)
+
+    xp = (width / 2 + X * ooz * K1).astype(np.intp)
+    yp = (height / 2 - Y * ooz * K1).astype(np.intp)
 
-            # Update rotation angle
-            angle += angle_increment
-            if angle >= 2 * math.pi:
-                angle -= 2 * math.pi
+    idx = xp + yp * width
+    inside = (idx >= 0) & (idx < width * height)
+    cells, _ = buffer.depth_test(idx[inside], ooz[inside])
+    buffer.glyphs[cells] = buffer.table.glyph(char)
+    return buffer.rows()
+
+def main(width=80, height=24, frames=None, screen=None, scheduler=None, cache=None):
+    # Terminal dimensions are parameters so the demo can also run
+    # headless for a fixed number of frames
+
+    # Parameters for the coin, with the speed snapped so the spin repeats
+    # after a whole number of frames
+    period, (angle_increment,) = rotation_period([10])  # Adjust for rotation speed
+
+    # Only the cells that change between frames are written
+    screen = screen or FrameDiffWriter()
+    scheduler = scheduler or FrameScheduler(fps=20)
+    # After the first period every frame is replayed from memory
+    cache = FrameCache() if cache is None else cache
+    # Frames are drawn into the same planes every time
+    buffer = FrameBuffer(width, height)
+
+    try:
+        frame = 0
+        while frames is None or frame < frames:
+            # Render the frame
+            phase = frame % period
+            output = cache.get((width, height, phase), render_frame,
+                               phase * angle_increment, width, height, buffer)
+            screen.write_frame(output)
 
-            time.sleep(0.05)
+            # Wait for the next frame, skipping any we fell behind on
+            frame += scheduler.wait()
     except KeyboardInterrupt:
         pass  # Allow the user to exit with Ctrl+C
+    finally:
+        screen.close()
 
 if __name__ == '__main__':
     main()
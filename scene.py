@@ -0,0 +1,45 @@
+from transform import rotate_points
+
+
+class Instance:
+    """One placement of a mesh: an offset followed by a rotation"""
+    __slots__ = ('mesh_key', 'mesh', 'matrix', 'offset', 'key')
+
+    def __init__(self, mesh_key, mesh, matrix, offset=(0, 0, 0)):
+        self.mesh_key = mesh_key
+        self.mesh = mesh
+        self.matrix = matrix
+        self.offset = tuple(float(value) for value in offset)
+        # Instances with equal keys put the mesh in exactly the same place
+        self.key = (mesh_key, matrix.tobytes(), self.offset)
+
+
+class Scene:
+    """Minimal scene graph of instanced meshes
+
+    Meshes are built once and kept in a GeometryCache, and every viewport
+    or object holds an Instance, which is just a mesh plus a transform.
+    Instances with the same transform share one transformed copy of the
+    mesh; copies are kept until begin_frame() starts the next frame.
+    """
+    def __init__(self, geometry):
+        self.geometry = geometry
+        self.transformed = {}
+        self.transforms = 0
+
+    def instance(self, mesh_key, builder, matrix, offset=(0, 0, 0)):
+        """Place the mesh for mesh_key, building it with builder() if needed"""
+        return Instance(mesh_key, self.geometry.get(mesh_key, builder), matrix, offset)
+
+    def begin_frame(self):
+        """Drop the transformed meshes of the previous frame"""
+        self.transformed.clear()
+
+    def points(self, instance):
+        """The instance's mesh points in view space"""
+        points = self.transformed.get(instance.key)
+        if points is None:
+            points = rotate_points(instance.mesh[0] + instance.offset, instance.matrix)
+            self.transformed[instance.key] = points
+            self.transforms += 1
+        return points
@@ -0,0 +1,73 @@
+import time
+
+
+class FrameScheduler:
+    """Paces a main loop against monotonic-clock frame deadlines
+
+    Every frame gets a deadline one frame period after the previous one,
+    so the frame rate no longer drifts with render cost. When rendering
+    falls behind, the missed frames are skipped instead of being drawn
+    late, and wait() reports how many frame periods passed so animation
+    state can advance by the same amount.
+
+    A separate simulation rate can be given for fixed-timestep physics:
+    sim_steps() returns how many fixed steps are due, and alpha is the
+    fraction of a step left over, for interpolating the drawn state.
+    """
+    def __init__(self, fps=30, sim_rate=None, max_skip=5, max_sim_steps=10,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.frame_time = 1.0 / fps
+        self.sim_time = 1.0 / sim_rate if sim_rate else None
+        self.max_skip = max_skip
+        self.max_sim_steps = max_sim_steps
+        self.clock = clock
+        self.sleep = sleep
+
+        self.deadline = None
+        self.skipped = 0
+        self.sim_last = None
+        self.accumulator = 0.0
+        self.alpha = 0.0
+
+    def wait(self):
+        """Sleep until the next frame deadline
+
+        Returns the number of frame periods that passed, which is 1 unless
+        frames were skipped to catch up.
+        """
+        now = self.clock()
+        if self.deadline is None:
+            self.deadline = now
+        self.deadline += self.frame_time
+
+        if now < self.deadline:
+            self.sleep(self.deadline - now)
+            return 1
+
+        # Behind schedule: skip every frame whose deadline already passed
+        missed = int((now - self.deadline) / self.frame_time)
+        if missed > self.max_skip:
+            # Too far behind to catch up, resynchronise to the clock
+            missed = self.max_skip
+            self.deadline = now
+        else:
+            self.deadline += missed * self.frame_time
+        self.skipped += missed
+        return 1 + missed
+
+    def sim_steps(self):
+        """Return how many fixed simulation steps are due since the last call"""
+        now = self.clock()
+        if self.sim_last is None:
+            self.sim_last = now
+        self.accumulator += now - self.sim_last
+        self.sim_last = now
+
+        steps = int(self.accumulator / self.sim_time)
+        self.accumulator -= steps * self.sim_time
+        if steps > self.max_sim_steps:
+            # Drop the backlog rather than spiral on slow machines
+            steps = self.max_sim_steps
+            self.accumulator = 0.0
+        self.alpha = self.accumulator / self.sim_time
+        return steps
@@ -0,0 +1,194 @@
+import sys
+
+import numpy as np
+
+CSI = '\033['
+
+
+class SGREncoder:
+    """Encodes glyphs with per-cell attributes into text
+
+    An attribute is a tuple of SGR parameters, e.g. (93,) for gold or
+    (97, 1) for bold white. An SGR sequence is only emitted when the
+    attribute changes along the output, and the sequence built for each
+    attribute is cached.
+    """
+    def __init__(self):
+        self.cache = {}
+        # Attribute the terminal is currently set to, None if unknown
+        self.current = None
+
+    def sgr(self, attr):
+        """Return the escape sequence that switches to attr"""
+        sequence = self.cache.get(attr)
+        if sequence is None:
+            params = (0,) + tuple(code for code in attr if code != 0)
+            sequence = CSI + ';'.join(map(str, params)) + 'm'
+            self.cache[attr] = sequence
+        return sequence
+
+    def encode(self, chars, attrs, start=0, end=None):
+        """Encode chars[start:end], switching attributes only on change"""
+        out = []
+        current = self.current
+        for char, attr in zip(chars[start:end], attrs[start:end]):
+            if attr != current:
+                out.append(self.sgr(attr))
+                current = attr
+            out.append(char)
+        self.current = current
+        return ''.join(out)
+
+    def encode_indexed(self, text, attrs, palette, start, end):
+        """Encode text[start:end] given attrs as indices into palette
+
+        The text is cut wherever the attribute index changes, so only
+        those places are looked at, not every cell.
+        """
+        cuts = np.flatnonzero(attrs[start + 1:end] != attrs[start:end - 1]) + start + 1
+        bounds = [start] + cuts.tolist() + [end]
+        out = []
+        current = self.current
+        for first, last in zip(bounds, bounds[1:]):
+            attr = palette[attrs[first]]
+            if attr != current:
+                out.append(self.sgr(attr))
+                current = attr
+            out.append(text[first:last])
+        self.current = current
+        return ''.join(out)
+
+
+class FrameDiffWriter:
+    """Terminal output layer that only emits the cells that changed
+
+    Frames are given as a list of rows, where each row is a string or a
+    sequence of cells and every cell occupies one terminal column. A
+    cell may carry its own escape sequences as long as it resets them.
+    The previously emitted frame is kept, and each new frame is written
+    as cursor-addressed runs covering just the changed cells.
+
+    Colors can instead be passed as a separate plane of SGR attributes,
+    one per cell, which are coalesced into runs by an SGREncoder.
+
+    write_planes() takes a frame as glyph and attribute index planes
+    instead (see framebuffer.FrameBuffer). It keeps copies of the planes,
+    finds the changed runs with array comparisons and only turns those
+    runs into text.
+    """
+    def __init__(self, stream=None, max_gap=4):
+        self.stream = stream if stream is not None else sys.stdout
+        self.encoder = SGREncoder()
+        # Unchanged cells shorter than this are rewritten instead of
+        # paying for another cursor move
+        self.max_gap = max_gap
+        self.previous = None
+
+    def reset(self):
+        """Forget the previous frame so the next one is fully redrawn"""
+        self.previous = None
+
+    def changed_runs(self, old, new):
+        """Return (start, end) column runs where new differs from old"""
+        changed = [x for x, (a, b) in enumerate(zip(old, new)) if a != b]
+        changed.extend(range(len(old), len(new)))
+
+        runs = []
+        for x in changed:
+            if runs and x - runs[-1][1] <= self.max_gap:
+                runs[-1][1] = x + 1
+            else:
+                runs.append([x, x + 1])
+        return runs
+
+    def write_frame(self, rows, attrs=None):
+        """Write a frame, diffed against the previous one"""
+        if isinstance(self.previous, tuple):
+            self.previous = None  # The last frame was written as planes
+        rows = [row if isinstance(row, str) else tuple(row) for row in rows]
+        if attrs is None:
+            cells = rows
+        else:
+            attrs = [tuple(row) for row in attrs]
+            cells = [tuple(zip(row, attr)) for row, attr in zip(rows, attrs)]
+
+        def encode(y, start, end):
+            if attrs is None:
+                return ''.join(rows[y][start:end])
+            return self.encoder.encode(rows[y], attrs[y], start, end)
+
+        out = []
+
+        if self.previous is None or len(self.previous) != len(cells):
+            # Full redraw on the first frame or when the size changes
+            out.append(CSI + '?25l' + CSI + '0m' + CSI + 'H' + CSI + '2J')
+            self.encoder.current = ()
+            for y, row in enumerate(cells):
+                out.append(f'{CSI}{y + 1};1H' + encode(y, 0, len(row)))
+        else:
+            for y, (old, row) in enumerate(zip(self.previous, cells)):
+                if old == row:
+                    continue
+                for start, end in self.changed_runs(old, row):
+                    out.append(f'{CSI}{y + 1};{start + 1}H' + encode(y, start, end))
+                if len(row) < len(old):
+                    out.append(f'{CSI}{y + 1};{len(row) + 1}H' + CSI + 'K')
+
+        self.previous = cells
+        if out:
+            self.stream.write(''.join(out))
+            self.stream.flush()
+
+    def write_planes(self, glyphs, attrs, table, palette):
+        """Write a frame of glyph and attribute index planes, diffed against the previous one
+
+        glyphs and attrs are (height, width) arrays of glyph numbers in
+        table, a GlyphTable, and of indices into palette, a list of SGR
+        attributes.
+        """
+        height, width = glyphs.shape
+        previous = self.previous
+        out = []
+
+        if not isinstance(previous, tuple) or previous[0].shape != glyphs.shape:
+            # Full redraw on the first frame or when the size changes
+            out.append(CSI + '?25l' + CSI + '0m' + CSI + 'H' + CSI + '2J')
+            self.encoder.current = ()
+            rows = np.arange(height)
+            starts = np.zeros(height, dtype=np.intp)
+            ends = np.full(height, width)
+        else:
+            old_glyphs, old_attrs = previous
+            if np.array_equal(old_glyphs, glyphs) and np.array_equal(old_attrs, attrs):
+                return
+
+            # Changed cells in row order, split into runs at new rows and
+            # at gaps longer than max_gap
+            ys, xs = np.nonzero((old_glyphs != glyphs) | (old_attrs != attrs))
+            split = np.flatnonzero((ys[1:] != ys[:-1]) | (xs[1:] - xs[:-1] - 1 > self.max_gap))
+            first = np.concatenate(([0], split + 1))
+            last = np.concatenate((split, [len(xs) - 1]))
+            rows, starts, ends = ys[first], xs[first], xs[last] + 1
+
+        # Only the rows that runs fall on are turned into text
+        lines = np.unique(rows)
+        text = dict(zip(lines.tolist(), table.rows(glyphs[lines])))
+        for y, start, end in zip(rows.tolist(), starts.tolist(), ends.tolist()):
+            out.append(f'{CSI}{y + 1};{start + 1}H'
+                       + self.encoder.encode_indexed(text[y], attrs[y], palette, start, end))
+
+        self.previous = (glyphs.copy(), attrs.copy())
+        if out:
+            self.stream.write(''.join(out))
+            self.stream.flush()
+
+    def close(self):
+        """Park the cursor below the last frame and show it again"""
+        if isinstance(self.previous, tuple):
+            height = len(self.previous[0])
+        else:
+            height = len(self.previous) if self.previous is not None else 0
+        self.stream.write(f'{CSI}0m{CSI}{height + 1};1H{CSI}?25h')
+        self.stream.flush()
+        self.previous = None
+        self.encoder.current = None
@@ -0,0 +1,24 @@
+import math
+
+import numpy as np
+
+
+def rotation_matrix(angle_x, angle_y, angle_z):
+    """Compose the X, then Y, then Z rotations into a single 3x3 matrix
+
+    The trig functions are evaluated once per call, so building the
+    matrix once per frame keeps them out of the per-point work.
+    """
+    cos_x, sin_x = math.cos(angle_x), math.sin(angle_x)
+    cos_y, sin_y = math.cos(angle_y), math.sin(angle_y)
+    cos_z, sin_z = math.cos(angle_z), math.sin(angle_z)
+    rot_x = np.array([[1, 0, 0], [0, cos_x, -sin_x], [0, sin_x, cos_x]])
+    rot_y = np.array([[cos_y, 0, sin_y], [0, 1, 0], [-sin_y, 0, cos_y]])
+    rot_z = np.array([[cos_z, -sin_z, 0], [sin_z, cos_z, 0], [0, 0, 1]])
+    return rot_z @ rot_y @ rot_x
+
+
+def rotate_points(points, matrix):
+    """Apply a 3x3 matrix to an (N,3) batch of points"""
+    return np.asarray(points, dtype=np.float64).reshape(-1, 3) @ matrix.T
+
@@ -0,0 +1,239 @@
+"""Render Matrix3DCoin viewports, in process or on a pool of workers
+
+Every viewport is drawn into two planes: the glyph of each cell as a
+code point (0 for an empty cell) and its curses color pair. With a
+ViewportPool the planes and the coin mesh live in shared memory, so
+workers render straight into them and only a few floats of parameters
+cross the process boundary; the main process just composites the planes
+and drives curses.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from lighting import brightness_buckets
+from transform import rotate_points
+
+# Point kinds in a packed coin mesh
+FACE, RIM, BODY = 0, 1, 2
+
+RIM_GLYPHS = '█▓▒'
+
+# Depth plane for every viewport size this process has rasterized,
+# reused from frame to frame
+depth_planes = {}
+
+
+def pack_shades(shades):
+    """Flatten a bucket table of (glyph choices, color) pairs into arrays
+
+    Returns (glyphs, starts, lengths, colors): the code points of every
+    distinct set of choices back to back, and per bucket where its set
+    starts, how many choices it has and its color pair.
+    """
+    sets = list(dict.fromkeys(choices for choices, _ in shades))
+    glyphs = np.array([ord(char) for choices in sets for char in choices], dtype=np.uint32)
+    offsets = np.cumsum([0] + [len(choices) for choices in sets])
+    index = {choices: i for i, choices in enumerate(sets)}
+    ids = np.array([index[choices] for choices, _ in shades])
+    colors = np.array([color for _, color in shades], dtype=np.uint8)
+    return glyphs, offsets[ids], np.diff(offsets)[ids], colors
+
+
+def depth_plane(size):
+    """This process's depth plane for a viewport of size cells, at infinite depth"""
+    if size not in depth_planes:
+        depth_planes[size] = np.empty(size)
+    plane = depth_planes[size]
+    plane.fill(-np.inf)
+    return plane
+
+
+def render_viewport(chars, colors, mesh, matrix, offset, *args, rng):
+    """Transform the coin mesh and rasterize it into a viewport"""
+    # Offset and rotate the whole mesh with one composed matrix
+    rotated = rotate_points(mesh[0] + offset, matrix)
+    rasterize_viewport(chars, colors, rotated, mesh, *args, rng=rng)
+
+
+def rasterize_viewport(chars, colors, rotated, mesh, camera_distance, thickness,
+                       matrix_mode, shades, rng):
+    """Draw transformed coin points into a viewport's glyph and color planes
+
+    mesh is (xyz, kinds, glyphs) with the code point of every FACE point,
+    and rotated holds its points in view space. The nearest point per
+    cell wins the depth test (the first one on ties).
+    """
+    height, width = chars.shape
+    chars.fill(0)
+    colors.fill(0)
+    _, kinds, face_glyphs = mesh
+    x, y, z = rotated[:, 0], rotated[:, 1], rotated[:, 2]
+
+    # Project to screen, dropping points behind the camera
+    dist = z + camera_distance
+    dist = np.where(dist > 0, dist, np.nan)
+    factor = camera_distance / dist
+    with np.errstate(invalid='ignore'):
+        screen_x = np.trunc(width // 2 + x * factor)
+        screen_y = np.trunc(height // 2 + y * factor * 0.5)  # Aspect correction
+        inside = (screen_x >= 0) & (screen_x < width) & (screen_y >= 0) & (screen_y < height)
+    points = np.flatnonzero(inside)
+    cell = screen_y[points].astype(np.intp) * width + screen_x[points].astype(np.intp)
+    depth = 1 / dist[points]
+
+    # Depth test with a scatter-max, keeping the first point on ties
+    zbuffer = depth_plane(height * width)
+    np.maximum.at(zbuffer, cell, depth)
+    front = np.flatnonzero(depth == zbuffer[cell])
+    cells, first = np.unique(cell[front], return_index=True)
+    winners = points[front[first]]
+    kinds, z = kinds[winners], z[winners]
+
+    # Choose character based on type and mode
+    glyph = face_glyphs[winners].copy()
+    color = np.zeros(len(winners), dtype=np.uint8)
+    face = kinds == FACE
+    if matrix_mode:
+        color[face] = 2  # Bright white for face
+        rim = kinds == RIM
+        glyph[rim] = np.array([ord(char) for char in RIM_GLYPHS], dtype=np.uint32)[
+            rng.integers(0, len(RIM_GLYPHS), rim.sum())]
+        color[rim] = np.where(z[rim] > 0, 1, 3)  # Green gradient
+
+        body = kinds == BODY
+        shade_glyphs, starts, lengths, shade_colors = shades
+        bucket = brightness_buckets((z[body] + thickness) / (2 * thickness))
+        pick = starts[bucket] + rng.integers(0, lengths[bucket])
+        glyph[body] = shade_glyphs[pick]
+        color[body] = shade_colors[bucket]
+    else:
+        glyph[~face] = np.where(z[~face] > 0, ord('█'), ord('▓'))
+
+    chars.ravel()[cells] = glyph
+    colors.ravel()[cells] = color
+
+
+class SharedArray:
+    """A NumPy array backed by a named shared memory block"""
+    def __init__(self, shape, dtype, name=None):
+        dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(shape)) * dtype.itemsize)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf)
+        self.spec = (self.shm.name, tuple(shape), dtype.str)
+
+    def close(self, unlink=False):
+        self.array = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+# Shared arrays a worker has attached to, by block name: window planes
+# in attached and the blocks of the last mesh it rendered in
+# attached_mesh. Then the worker's random glyph choices, seeded afresh in
+# every worker by seed_worker
+attached = {}
+attached_mesh = {}
+worker_rng = np.random.default_rng()
+
+
+def seed_worker():
+    """Give a new worker its own glyph choices
+
+    Forked workers inherit the parent's generator, so without this they
+    would all pick the same glyphs.
+    """
+    global worker_rng
+    worker_rng = np.random.default_rng()
+
+
+def attach(spec, cache=attached):
+    """The array for a SharedArray spec, attaching on first use"""
+    name, shape, dtype = spec
+    if name not in cache:
+        cache[name] = SharedArray(shape, dtype, name)
+    return cache[name].array
+
+
+def attach_mesh(specs):
+    """The arrays of a mesh, closing the blocks of any mesh it replaced
+
+    ViewportPool.upload unlinks a replaced mesh, but its memory is only
+    freed once every worker has closed its mapping too.
+    """
+    names = {name for name, _, _ in specs}
+    for name in [name for name in attached_mesh if name not in names]:
+        attached_mesh.pop(name).close()
+    return tuple(attach(spec, attached_mesh) for spec in specs)
+
+
+def render_job(chars, colors, mesh, *args):
+    """Worker side of ViewportPool.render"""
+    render_viewport(attach(chars), attach(colors), attach_mesh(mesh), *args, rng=worker_rng)
+
+
+class ViewportPool:
+    """Process pool that renders viewports into shared memory planes
+
+    share() moves a window's planes into shared memory and upload() does
+    the same for a coin mesh, once per mesh. render() then sends each
+    window's transform to a worker and waits for all of them.
+    """
+    def __init__(self, workers):
+        self.executor = ProcessPoolExecutor(workers, initializer=seed_worker)
+        self.planes = []
+        self.mesh_key = None
+        self.mesh = ()
+
+    def share(self, windows):
+        """Back each window's glyph and color planes with shared memory"""
+        for window in windows:
+            for plane in ('chars', 'colors'):
+                array = getattr(window, plane)
+                shared = SharedArray(array.shape, array.dtype)
+                shared.array[...] = array
+                self.planes.append((window, plane, shared))
+                setattr(window, plane, shared.array)
+                setattr(window, plane + '_spec', shared.spec)
+
+    def upload(self, key, mesh):
+        """Copy a mesh into shared memory unless it is already there"""
+        if key == self.mesh_key:
+            return
+        for shared in self.mesh:
+            shared.close(unlink=True)
+        self.mesh = []
+        for array in mesh:
+            shared = SharedArray(array.shape, array.dtype)
+            shared.array[...] = array
+            self.mesh.append(shared)
+        self.mesh_key = key
+
+    def render(self, jobs):
+        """Render jobs of (window, *render_viewport arguments after the mesh)"""
+        mesh = tuple(shared.spec for shared in self.mesh)
+        futures = [self.executor.submit(render_job, window.chars_spec, window.colors_spec, mesh, *args)
+                   for window, *args in jobs]
+        for future in futures:
+            future.result()
+
+    def close(self):
+        """Stop the workers and free the shared memory
+
+        Windows get private copies of their planes, so they stay usable.
+        """
+        self.executor.shutdown()
+        for window, plane, shared in self.planes:
+            setattr(window, plane, shared.array.copy())
+            shared.close(unlink=True)
+        for shared in self.mesh:
+            shared.close(unlink=True)
+        self.planes = []
+        self.mesh = ()
+        self.mesh_key = None